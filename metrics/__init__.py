@@ -0,0 +1,10 @@
+"""
+GitHub profile metrics: ``fetch`` collects them from the GitHub API,
+``render`` and ``encode`` turn them into animations, and ``pipeline``
+drives a whole run (``benchmark`` times it). ``mock_server`` is a
+local stand-in for the API, serving the synthetic sample responses in
+``fixtures/`` for offline testing.
+
+Submodules are not imported here, so importing ``metrics.fetch`` never
+pulls in Pillow or numpy.
+"""
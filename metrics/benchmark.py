@@ -0,0 +1,243 @@
+"""
+--benchmark: per-stage render timings of every visualizer at fixed metric
+values, checked against a stored baseline.
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .pipeline import DASHBOARD_COLORS, SOURCE_HASH, dashboard_sources
+from .render import (
+    Colors,
+    FollowerVisualizer,
+    ForkVisualizer,
+    IssueVisualizer,
+    MetricVisualizer,
+    PRVisualizer,
+    StarVisualizer,
+    compose_2x2_grid,
+    create_svg_embedded_gif,
+    load_fonts,
+)
+from .timing import stage_timer
+
+BENCHMARK_VALUES = (0, 10, 1_000, 1_000_000)
+BENCHMARK_VISUALIZERS = [
+    (StarVisualizer, Colors.STAR, "[*] Total Stars"),
+    (ForkVisualizer, Colors.FORK, "[~] Total Forks"),
+    (IssueVisualizer, Colors.ISSUE, "[!] Open Issues"),
+    (FollowerVisualizer, Colors.FOLLOWER, "[@] Followers"),
+    (PRVisualizer, Colors.PR, "[+] Pull Requests"),
+]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process, or None where unsupported."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_isolated(fn, *fn_args):
+    """Run one benchmark case in a forked child, so its peak RSS is its own."""
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return fn(*fn_args)
+    ctx = multiprocessing.get_context("fork")
+    receiver, sender = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=lambda: sender.send(fn(*fn_args)))
+    proc.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    except EOFError:
+        raise RuntimeError(f"benchmark case exited with code {proc.exitcode}")
+    finally:
+        proc.join()
+
+
+def benchmark_metric(settings, cls, palette, label, value, path):
+    """Render one visualizer at one metric value and measure it."""
+    stage_timer.reset()
+    visualizer = cls(settings.w, settings.h, palette, label, settings.scale)
+    start = time.perf_counter()
+    visualizer.animate(
+        value,
+        path,
+        settings.frames,
+        settings.fps,
+        dither=settings.dither,
+        delta=settings.delta,
+        pingpong=settings.pingpong,
+    )
+    elapsed = time.perf_counter() - start
+    return {
+        "case": cls.__name__,
+        "value": value,
+        "frames": settings.frames,
+        "wall_seconds": round(elapsed, 4),
+        "fps": round(settings.frames / elapsed, 2),
+        "particles_spawned": visualizer.system.spawned,
+        "particles_peak": visualizer.system.peak,
+        "peak_rss_mb": peak_rss_mb(),
+        "bytes": os.path.getsize(path),
+        "stages": stage_timer.report(),
+    }
+
+
+def benchmark_dashboard(settings, value, paths, out_dir):
+    """Compose the 2x2 dashboard and its SVG embed, as after a fresh render."""
+    stage_timer.reset()
+    dashboard_path = os.path.join(out_dir, f"dashboard_{value}.gif")
+    svg_path = os.path.join(out_dir, f"dashboard_{value}.svg")
+    metrics = dict.fromkeys(("stars", "forks", "issues", "followers", "repos"), value)
+    start = time.perf_counter()
+    compose_2x2_grid(
+        dashboard_sources(settings, metrics, paths, range(len(paths))),
+        dashboard_path,
+        settings.frames,
+        settings.dashboard_fps,
+        cell_size=(settings.out_w, settings.out_h),
+        fixed_colors=DASHBOARD_COLORS,
+        dither=settings.dither,
+        delta=settings.delta,
+        pingpong=settings.pingpong,
+        stride=max(1, round(settings.scale)),
+    )
+    create_svg_embedded_gif(dashboard_path, svg_path, metrics, owner="benchmark")
+    elapsed = time.perf_counter() - start
+    return {
+        "case": "dashboard",
+        "value": value,
+        "frames": settings.frames,
+        "wall_seconds": round(elapsed, 4),
+        "fps": round(settings.frames / elapsed, 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "bytes": os.path.getsize(svg_path),
+        "stages": stage_timer.report(),
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """
+    List the cases that got slower or bigger than the baseline allows,
+    or return None when the baseline was recorded with other settings.
+    """
+    if baseline.get("settings") != report["settings"]:
+        return None
+    before = {(c["case"], c["value"]): c for c in baseline["cases"]}
+    regressions = []
+    for case in report["cases"]:
+        old = before.get((case["case"], case["value"]))
+        if old is None:
+            continue
+        name = f"{case['case']}({case['value']:,})"
+        # An absolute floor keeps timer noise on tiny cases out
+        slack = max(old["wall_seconds"] * tolerance, 0.1)
+        if case["wall_seconds"] > old["wall_seconds"] + slack:
+            regressions.append(
+                f"{name}: {old['wall_seconds']:.2f}s -> {case['wall_seconds']:.2f}s"
+            )
+        if (
+            old["peak_rss_mb"]
+            and case["peak_rss_mb"]
+            and case["peak_rss_mb"] > old["peak_rss_mb"] * (1 + tolerance)
+        ):
+            regressions.append(
+                f"{name}: {old['peak_rss_mb']} MB -> {case['peak_rss_mb']} MB peak RSS"
+            )
+    return regressions
+
+
+def run_benchmark(
+    settings,
+    out_path="benchmark.json",
+    baseline_path=".cache/benchmark_baseline.json",
+    update_baseline=False,
+    tolerance=0.25,
+):
+    """
+    Render every visualizer at BENCHMARK_VALUES with the fixed seed, then
+    the dashboard for each value, and write the measurements as JSON.
+
+    Returns the exit code: 1 when a case regressed against the baseline
+    by more than ``tolerance``.
+    """
+    out_w, out_h = settings.out_w, settings.out_h
+    print(
+        f"\n[BENCH] {len(BENCHMARK_VISUALIZERS)} visualizers x "
+        f"{len(BENCHMARK_VALUES)} metric values, {out_w}x{out_h}"
+    )
+    load_fonts(MetricVisualizer.font_size_for(out_h))
+    stage_timer.enabled = True
+    cases = []
+    with tempfile.TemporaryDirectory(prefix="metrics-bench-") as tmp:
+        for value in BENCHMARK_VALUES:
+            paths = []
+            for cls, palette, label in BENCHMARK_VISUALIZERS:
+                path = os.path.join(tmp, f"{cls.__name__}_{value}.gif")
+                cases.append(
+                    run_isolated(
+                        benchmark_metric, settings, cls, palette, label, value, path
+                    )
+                )
+                paths.append(path)
+            # The dashboard shows the same four metrics as a real run
+            cases.append(
+                run_isolated(benchmark_dashboard, settings, value, paths[:4], tmp)
+            )
+
+    report = {
+        "settings": {
+            "width": out_w,
+            "height": out_h,
+            "frames": settings.frames,
+            "fps": settings.fps,
+            "dashboard_fps": settings.dashboard_fps,
+            "dither": settings.dither,
+            "delta": settings.delta,
+            "loop": settings.loop,
+        },
+        "source": SOURCE_HASH[:12],
+        "python": sys.version.split()[0],
+        "total_seconds": round(sum(c["wall_seconds"] for c in cases), 4),
+        "cases": cases,
+    }
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n  {'case':<20}{'value':>10}{'wall s':>9}{'fps':>8}{'RSS MB':>9}  slowest")
+    for case in cases:
+        slowest = next(iter(case["stages"]), "-")
+        print(
+            f"  {case['case']:<20}{case['value']:>10,}{case['wall_seconds']:>9.2f}"
+            f"{case['fps']:>8.1f}{case['peak_rss_mb'] or 0:>9.0f}  {slowest}"
+        )
+    print(f"  Report: {out_path} ({report['total_seconds']:.1f}s total)")
+
+    baseline_path = Path(baseline_path)
+    if update_baseline or not baseline_path.exists():
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"  Baseline saved: {baseline_path}")
+        return 0
+
+    regressions = compare_to_baseline(
+        report, json.loads(baseline_path.read_text()), tolerance
+    )
+    if regressions is None:
+        print(f"  {baseline_path} was recorded with other settings, not comparing")
+        return 0
+    for line in regressions:
+        print(f"  Regression: {line}")
+    if not regressions:
+        print(f"  No regressions against {baseline_path}")
+    return 1 if regressions else 0
@@ -0,0 +1,567 @@
+"""
+Frame encoding: shared GIF palettes and the delta GifWriter, plus the
+WebP, APNG and MP4 backends that take the same stream of RGB frames.
+"""
+
+import contextlib
+import math
+import os
+import time
+
+import numpy as np
+from PIL import GifImagePlugin, Image
+
+from .timing import stage_timer
+
+# ============================================================
+# GIF PALETTES - one shared palette per GIF, batch frame mapping
+# ============================================================
+
+# 8x8 Bayer matrix, normalized to [-0.5, 0.5) thresholds
+BAYER_8X8 = (
+    np.array(
+        [
+            [0, 32, 8, 40, 2, 34, 10, 42],
+            [48, 16, 56, 24, 50, 18, 58, 26],
+            [12, 44, 4, 36, 14, 46, 6, 38],
+            [60, 28, 52, 20, 62, 30, 54, 22],
+            [3, 35, 11, 43, 1, 33, 9, 41],
+            [51, 19, 59, 27, 49, 17, 57, 25],
+            [15, 47, 7, 39, 13, 45, 5, 37],
+            [63, 31, 55, 23, 61, 29, 53, 21],
+        ],
+        dtype=np.float32,
+    )
+    + 0.5
+) / 64 - 0.5
+
+
+def sample_indices(count, samples=8):
+    """Evenly spaced frame indices the palette is built from."""
+    picks = np.linspace(0, count - 1, min(samples, count))
+    return sorted(set(picks.round().astype(int).tolist()))
+
+
+def forward_frames(count, pingpong=False):
+    """Frames actually rendered for a loop of ``count`` frames.
+
+    A ping-pong loop renders the first half and the turning frame only;
+    GifWriter plays them back in reverse for the second half.
+    """
+    return count // 2 + 1 if pingpong else count
+
+
+def build_global_palette(frame_sets, fixed_colors=(), colors=255, samples=8, stride=1):
+    """Build one palette image from a sample of frames across all sequences.
+
+    The fixed colors (e.g. a metric's `Colors` entries) are always kept
+    exactly; the rest of the palette is median-cut from the samples. The
+    default of 255 colors leaves GIF_TRANSPARENT_INDEX unused. A stride
+    above 1 samples every stride-th row and column, which keeps the cost
+    of large frames at that of small ones.
+    """
+    fixed = list(dict.fromkeys(tuple(c) for c in fixed_colors))
+    pixels = []
+    for frames in frame_sets:
+        for i in sample_indices(len(frames), samples):
+            rgb = np.asarray(frames[i].convert("RGB"))[::stride, ::stride]
+            pixels.append(rgb.reshape(-1, 3))
+    pixels = np.concatenate(pixels)
+    rows = len(pixels) // 1024
+    sample = Image.fromarray(pixels[: rows * 1024].reshape(rows, 1024, 3))
+
+    palette = sample.quantize(colors - len(fixed), method=Image.MEDIANCUT)
+    entries = palette.getpalette()[: (colors - len(fixed)) * 3]
+    entries += [v for c in fixed for v in c]
+    palette.putpalette(entries)
+    return palette
+
+
+def quantize_frame(frame, palette, dither=False):
+    """Map an RGB frame onto a shared palette, optionally with ordered dithering."""
+    with stage_timer("quantize"):
+        frame = frame.convert("RGB")
+        if dither:
+            rgb = np.asarray(frame, dtype=np.float32)
+            h, w = rgb.shape[:2]
+            threshold = np.tile(BAYER_8X8, (h // 8 + 1, w // 8 + 1))[:h, :w]
+            rgb = rgb + threshold[..., None] * 16
+            frame = Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8), "RGB")
+        return frame.quantize(palette=palette, dither=Image.Dither.NONE)
+
+
+# Palette index never produced by quantize_frame(); the delta encoder uses
+# it for pixels that did not change since the previous frame
+GIF_TRANSPARENT_INDEX = 255
+
+
+class GifWriter:
+    """Incremental GIF writer for palette frames that share one palette.
+
+    With delta=True every frame after the first stores only the bounding
+    box of pixels that changed since the previous frame, with unchanged
+    pixels inside it set to the transparent index, and is layered on top
+    of it (disposal 1). The first frame is always a full canvas, so the
+    loop restarts cleanly. With delta=False every frame is written in full
+    with disposal 2, as before.
+
+    With pingpong=True, closing the writer appends the frames from the
+    second last back to the second, so the loop plays forward and back.
+    Those are never quantized or diffed again: full frames reuse their
+    encoded bytes, and delta frames reuse the rectangle of the forward
+    step they undo, filled from the frame before it.
+    """
+
+    def __init__(self, path, palette, duration, loop=0, delta=True, pingpong=False):
+        self.path = path
+        self.palette = palette
+        self.duration = duration
+        self.loop = loop
+        self.delta = delta
+        self.pingpong = pingpong
+        self.frames = 0
+        self._fp = None
+        self._previous = None
+        self._pending = None
+        # With pingpong, per forward frame: how to get back to it
+        self._mirror = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_frame(self, frame):
+        with stage_timer("gif_write"):
+            indices = np.asarray(frame)
+            if self._fp is None:
+                self._fp = open(self.path, "wb")
+                first = frame.copy()
+                first.putpalette(self.palette.getpalette())
+                header, _ = GifImagePlugin.getheader(first, info={"loop": self.loop})
+                for chunk in header:
+                    self._fp.write(chunk)
+
+            if not self.delta or self._previous is None:
+                self._queue(indices, (0, 0), self.duration)
+            else:
+                changed = indices != self._previous
+                rows = np.flatnonzero(changed.any(axis=1))
+                if rows.size == 0:
+                    # Identical frame: just hold the previous one longer
+                    self._pending[2] += self.duration
+                    if self.pingpong:
+                        self._mirror.append(None)
+                    return
+                cols = np.flatnonzero(changed.any(axis=0))
+                y0, y1, x0, x1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+                offset = (int(x0), int(y0))
+                unchanged = ~changed[y0:y1, x0:x1]
+                patch = indices[y0:y1, x0:x1].copy()
+                patch[unchanged] = GIF_TRANSPARENT_INDEX
+                self._queue(patch, offset, self.duration)
+                if self.pingpong:
+                    # Stepping back from this frame touches the same rectangle
+                    back = self._previous[y0:y1, x0:x1].copy()
+                    back[unchanged] = GIF_TRANSPARENT_INDEX
+                    self._mirror.append((back, offset))
+            self._previous = indices
+
+    def _queue(self, indices, offset, duration):
+        # One frame of lookahead lets identical frames extend the duration
+        self._flush()
+        self._pending = [indices, offset, duration]
+
+    def _flush(self):
+        if self._pending is None:
+            return
+        indices, offset, duration = self._pending
+        params = {"duration": duration, "disposal": 2}
+        if self.delta:
+            params.update(disposal=1, transparency=GIF_TRANSPARENT_INDEX)
+        patch = Image.fromarray(np.ascontiguousarray(indices), "P")
+        data = b"".join(GifImagePlugin.getdata(patch, offset, **params))
+        self._fp.write(data)
+        if self.pingpong and not self.delta:
+            self._mirror.append(data)
+        self.frames += 1
+        self._pending = None
+
+    def _play_back(self):
+        """Append the frames from the second last back to the second."""
+        if not self.delta:
+            self._flush()
+            for data in self._mirror[-2:0:-1]:
+                self._fp.write(data)
+                self.frames += 1
+            return
+        # Entry k steps from frame k + 1 back to frame k; the loop then
+        # closes on the first frame, which is always a full canvas
+        for step in self._mirror[:0:-1]:
+            if step is None:
+                self._pending[2] += self.duration
+            else:
+                self._queue(*step, self.duration)
+
+    def close(self):
+        if self._fp is None:
+            return
+        with stage_timer("gif_write"):
+            if self.pingpong:
+                self._play_back()
+            self._flush()
+        self._fp.write(b";")
+        self._fp.close()
+        self._fp = None
+
+
+# ============================================================
+# OUTPUT ENCODERS - one RGB frame stream, several file formats
+# ============================================================
+
+
+class FrameEncoder:
+    """
+    Base class of the animation encoders.
+
+    Every backend takes the same stream of RGB frames through add_frame()
+    and writes one file when closed; the caller may reuse a frame's image
+    once add_frame() returns. Backends that map frames onto a palette set
+    NEEDS_SAMPLES and are given a few sample frames up front. ``seconds``
+    is the time spent encoding, not rendering the frames, and ``frames``
+    the number of frames in the file, the mirrored ones of a ping-pong
+    loop included.
+    """
+
+    NAME = None
+    EXTENSION = None
+    NEEDS_SAMPLES = False
+    # Stage the encoding is timed as by --benchmark and --profile
+    STAGE = None
+
+    def __init__(self, path, fps, pingpong=False):
+        self.path = path
+        self.fps = fps
+        self.pingpong = pingpong
+        self.frames = 0
+        self.seconds = 0.0
+
+    @classmethod
+    def missing(cls):
+        """Why this backend can't run here, or None if it can."""
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _timed(self, fn, *fn_args):
+        start = time.perf_counter()
+        with stage_timer(self.STAGE) if self.STAGE else contextlib.nullcontext():
+            fn(*fn_args)
+        self.seconds += time.perf_counter() - start
+
+    def add_frame(self, frame):
+        self._timed(self._add, frame)
+        self.frames += 1
+
+    def close(self):
+        self._timed(self._close)
+        if self.pingpong:
+            # Every backend plays back the second last to the second frame
+            self.frames += max(0, self.frames - 2)
+
+    def _add(self, frame):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+
+class GifEncoder(FrameEncoder):
+    """Palette GIF through GifWriter, with one palette built from the samples."""
+
+    NAME = "gif"
+    EXTENSION = ".gif"
+    NEEDS_SAMPLES = True
+
+    def __init__(
+        self,
+        path,
+        fps,
+        pingpong=False,
+        sample_sets=(),
+        fixed_colors=(),
+        stride=1,
+        dither=False,
+        delta=True,
+    ):
+        super().__init__(path, fps, pingpong)
+        start = time.perf_counter()
+        with stage_timer("palette"):
+            self.palette = build_global_palette(
+                sample_sets, fixed_colors=fixed_colors, stride=stride
+            )
+        self.seconds += time.perf_counter() - start
+        self.dither = dither
+        self.writer = GifWriter(
+            path, self.palette, int(1000 / fps), delta=delta, pingpong=pingpong
+        )
+
+    def _add(self, frame):
+        self.writer.add_frame(quantize_frame(frame, self.palette, self.dither))
+
+    def _close(self):
+        self.writer.close()
+
+
+class PillowAnimationEncoder(FrameEncoder):
+    """
+    Animated image through Pillow's save_all, which needs every frame at
+    once: frames are kept until close. A ping-pong loop appends the same
+    images again in reverse.
+    """
+
+    FORMAT = None
+    OPTIONS = {}
+
+    def __init__(self, path, fps, pingpong=False):
+        super().__init__(path, fps, pingpong)
+        self._frames = []
+
+    def _add(self, frame):
+        self._frames.append(frame.convert("RGB"))
+
+    def _close(self):
+        frames = self._frames
+        if not frames:
+            return
+        if self.pingpong:
+            frames = frames + frames[-2:0:-1]
+        frames[0].save(
+            self.path,
+            format=self.FORMAT,
+            save_all=True,
+            append_images=frames[1:],
+            duration=int(1000 / self.fps),
+            loop=0,
+            **self.OPTIONS,
+        )
+        self._frames = []
+
+
+class WebPEncoder(PillowAnimationEncoder):
+    """Lossy animated WebP."""
+
+    NAME = "webp"
+    EXTENSION = ".webp"
+    STAGE = "webp_encode"
+    FORMAT = "WEBP"
+    OPTIONS = {"quality": 80, "method": 4}
+
+    @classmethod
+    def missing(cls):
+        from PIL import features
+
+        if not features.check("webp"):
+            return "Pillow was built without WebP support"
+        return None
+
+
+class ApngEncoder(PillowAnimationEncoder):
+    """Lossless animated PNG; Pillow stores only each frame's changed rectangle."""
+
+    NAME = "apng"
+    EXTENSION = ".png"
+    STAGE = "apng_encode"
+    FORMAT = "PNG"
+
+
+class Mp4Encoder(FrameEncoder):
+    """
+    H.264 MP4 through imageio's ffmpeg plugin, streamed frame by frame.
+
+    MP4 has no loop flag of its own; embed it as ``<video autoplay loop
+    muted playsinline>``. A ping-pong loop keeps the forward frames to
+    send them again in reverse.
+    """
+
+    NAME = "mp4"
+    EXTENSION = ".mp4"
+    STAGE = "mp4_encode"
+
+    @classmethod
+    def missing(cls):
+        try:
+            import imageio  # noqa: F401
+            import imageio_ffmpeg  # noqa: F401
+        except ImportError:
+            return "needs imageio and imageio-ffmpeg"
+        return None
+
+    def __init__(self, path, fps, pingpong=False):
+        super().__init__(path, fps, pingpong)
+        import imageio.v2 as imageio
+
+        self._writer = imageio.get_writer(
+            path,
+            format="FFMPEG",
+            mode="I",
+            fps=fps,
+            codec="libx264",
+            pixelformat="yuv420p",
+            quality=8,
+            # yuv420p needs even sizes, which _add() pads to; any other
+            # block size would make imageio rescale the frames
+            macro_block_size=2,
+            ffmpeg_log_level="error",
+            output_params=["-movflags", "+faststart"],
+        )
+        self._forward = [] if pingpong else None
+
+    def _add(self, frame):
+        rgb = np.asarray(frame.convert("RGB"))
+        h, w = rgb.shape[:2]
+        if h % 2 or w % 2:
+            rgb = np.pad(rgb, ((0, h % 2), (0, w % 2), (0, 0)), mode="edge")
+        self._writer.append_data(rgb)
+        if self._forward is not None:
+            self._forward.append(rgb)
+
+    def _close(self):
+        for rgb in (self._forward or [])[-2:0:-1]:
+            self._writer.append_data(rgb)
+        self._writer.close()
+
+
+ENCODERS = {cls.NAME: cls for cls in (GifEncoder, WebPEncoder, ApngEncoder, Mp4Encoder)}
+
+
+def open_encoders(paths, fps, pingpong=False, sample_sets=None, **palette_options):
+    """
+    One encoder per path, picked by file extension. ``sample_sets`` and
+    the palette options only go to the backends that need samples.
+    """
+    by_extension = {cls.EXTENSION: cls for cls in ENCODERS.values()}
+    encoders = []
+    for path in paths:
+        cls = by_extension[os.path.splitext(path)[1].lower()]
+        options = (
+            dict(palette_options, sample_sets=sample_sets) if cls.NEEDS_SAMPLES else {}
+        )
+        encoders.append(cls(path, fps, pingpong=pingpong, **options))
+    return encoders
+
+
+def needs_samples(paths):
+    """Whether any of the encoders for ``paths`` wants palette samples."""
+    return any(
+        cls.NEEDS_SAMPLES
+        for cls in ENCODERS.values()
+        if any(p.lower().endswith(cls.EXTENSION) for p in paths)
+    )
+
+
+def decode_frames(path, frame_duration=None):
+    """Decode any encoder's output back into RGB frames, one at a time."""
+    if path.endswith(Mp4Encoder.EXTENSION):
+        import imageio.v2 as imageio
+
+        with imageio.get_reader(path, format="FFMPEG") as reader:
+            for rgb in reader:
+                yield Image.fromarray(rgb)
+        return
+    # Pillow exposes per-frame durations for animated WebP and APNG too
+    yield from iter_gif_frames(path, frame_duration)
+
+
+def psnr(path, frames, fps):
+    """
+    PSNR in dB of an encoded animation against the RGB ``frames`` it was
+    made from, or None when it is lossless.
+    """
+    squared_error, count = 0.0, 0
+    for source, decoded in zip(frames, decode_frames(path, int(1000 / fps))):
+        source = np.asarray(source.convert("RGB"), dtype=np.float32)
+        decoded = np.asarray(decoded.convert("RGB"), dtype=np.float32)
+        diff = decoded[: source.shape[0], : source.shape[1]] - source
+        squared_error += float(np.mean(diff * diff))
+        count += 1
+    if not count or squared_error == 0:
+        return None
+    return round(10 * math.log10(255**2 / (squared_error / count)), 2)
+
+
+def encode_results(encoders, source=None):
+    """
+    Time and size of every closed encoder's output; with ``source``, a
+    callable returning a fresh iterator over the frames, also its PSNR.
+    """
+    results = []
+    for encoder in encoders:
+        result = {
+            "path": encoder.path,
+            "encoder": encoder.NAME,
+            "frames": encoder.frames,
+            "seconds": round(encoder.seconds, 4),
+            "bytes": os.path.getsize(encoder.path),
+        }
+        if source is not None:
+            result["psnr_db"] = psnr(encoder.path, source(), encoder.fps)
+        results.append(result)
+    return results
+
+
+def iter_gif_frames(path, frame_duration=None, only=None):
+    """
+    Decode a GIF written by GifWriter one RGB frame at a time.
+
+    GifWriter stores runs of identical frames once with a longer duration,
+    so those are expanded again against ``frame_duration`` (by default the
+    first frame's duration) to keep the original frame count. With
+    ``only``, just those frame indices are converted and yielded.
+    """
+    index = 0
+    with Image.open(path) as img:
+        step = frame_duration or img.info.get("duration") or 0
+        try:
+            while True:
+                duration = img.info.get("duration") or step
+                repeat = max(1, round(duration / step)) if step else 1
+                frame = None
+                for index in range(index, index + repeat):
+                    if only is None or index in only:
+                        if frame is None:
+                            with stage_timer("gif_decode"):
+                                frame = img.convert("RGB")
+                        yield frame
+                index += 1
+                with stage_timer("gif_decode"):
+                    img.seek(img.tell() + 1)
+        except EOFError:
+            pass
+
+
+def iter_spooled_frames(path, size, only=None):
+    """
+    Read back RGB frames of ``size`` spooled raw to ``path``, one after
+    another, one at a time. With ``only``, just those frame indices are
+    read and yielded.
+    """
+    frame_bytes = size[0] * size[1] * 3
+    with open(path, "rb") as f:
+        index = 0
+        while True:
+            if only is not None:
+                index = min((i for i in only if i >= index), default=None)
+                if index is None:
+                    return
+                f.seek(index * frame_bytes)
+            data = f.read(frame_bytes)
+            if len(data) < frame_bytes:
+                return
+            yield Image.frombytes("RGB", size, data)
+            index += 1
@@ -0,0 +1,1001 @@
+"""
+GitHub API access: the pooled client with its ETag cache and rate-limit
+scheduler, the SQLite repository snapshot, and the profile metrics fetchers.
+
+Only needs requests, so fetching never loads the rendering dependencies.
+"""
+
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .timing import stage_timer
+
+# GitHub username and token configuration
+GITHUB_USERNAME = os.environ.get("GITHUB_USERNAME", "HackCocaine")
+GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", "")
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+GITHUB_GRAPHQL_URL = os.environ.get("GITHUB_GRAPHQL_URL")
+CACHE_DIR = Path(os.environ.get("METRICS_CACHE_DIR", ".cache"))
+
+
+# Request priorities for the rate-limit scheduler, most important first
+PRIORITY_ESSENTIAL = 0  # profile and repository listing
+PRIORITY_NORMAL = 1  # single extra lookups, e.g. the merged PR search
+PRIORITY_LOW = 2  # per-repository fan-out, e.g. contributors
+
+# Share of a resource's limit held back from each priority
+RATE_RESERVE = {PRIORITY_ESSENTIAL: 0.0, PRIORITY_NORMAL: 0.05, PRIORITY_LOW: 0.10}
+
+
+class ApiResponse:
+    """Decoded API response, either fresh or replayed from the ETag cache."""
+
+    def __init__(
+        self, data, status: int, headers, cached: bool = False, stale: bool = False
+    ):
+        self.data = data
+        self.status = status
+        self.headers = headers
+        self.cached = cached
+        # Served from the cache because the request was skipped or failed
+        self.stale = stale
+
+    @property
+    def links(self) -> Dict[str, Dict[str, str]]:
+        """Parsed ``Link`` header, keyed by ``rel`` like ``requests``' own."""
+        link = self.headers.get("Link")
+        if not link:
+            return {}
+        return {
+            entry.get("rel") or entry["url"]: entry
+            for entry in requests.utils.parse_header_links(link)
+        }
+
+
+class GraphQLError(requests.exceptions.RequestException):
+    """The GraphQL endpoint answered, but with an ``errors`` payload."""
+
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    """The scheduler held a request back to protect the remaining budget."""
+
+
+def response_size(resp) -> int:
+    """Bytes on the wire for a response body, compressed if it was."""
+    length = resp.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else len(resp.content)
+
+
+class GitHubClient:
+    """
+    Pooled GitHub REST client.
+
+    One ``requests.Session`` keeps connections alive across calls, transient
+    failures are retried with exponential backoff, and every GET is sent with
+    ``If-None-Match`` so unchanged resources come back as a 304 (which does
+    not count against the rate limit) and are served from the on-disk cache.
+    Responses are also memoised for the lifetime of the client, so asking for
+    the same resource twice in one run costs no request at all.
+
+    The ``X-RateLimit-*`` headers are tracked per resource (core, search,
+    graphql). Before each request the budget is checked against the share
+    ``RATE_RESERVE`` holds back from its priority: if the window resets within
+    ``max_wait`` seconds the request waits for it, otherwise it is skipped.
+    A skipped or failed request is answered with the last cached copy of the
+    resource when there is one.
+    """
+
+    def __init__(
+        self,
+        token: str = GITHUB_TOKEN,
+        base_url: str = GITHUB_API_URL,
+        graphql_url: Optional[str] = GITHUB_GRAPHQL_URL,
+        cache_path: Optional[Path] = CACHE_DIR / "etags.json",
+        max_workers: int = 8,
+        timeout: float = 10,
+        max_wait: float = 60,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.graphql_url = graphql_url or f"{self.base_url}/graphql"
+        self.cache_path = cache_path
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_wait = max_wait
+
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=("GET",),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "Accept": "application/vnd.github.v3+json",
+                "User-Agent": "GitHub-Metrics-Dashboard",
+            }
+        )
+        if token:
+            self.session.headers["Authorization"] = f"token {token}"
+
+        self._lock = threading.Lock()
+        self._etags = self._load_etags()
+        self._seen: Dict[str, ApiResponse] = {}
+        # Latest X-RateLimit-* values per resource ("core", "search", ...)
+        self.rate_limits: Dict[str, dict] = {}
+
+    def _load_etags(self) -> Dict[str, dict]:
+        if not self.cache_path or not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """Persist the ETag cache so the next run can revalidate against it."""
+        if not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with self._lock:
+            with open(tmp_path, "w") as f:
+                json.dump(self._etags, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def url(self, path: str) -> str:
+        return path if "://" in path else f"{self.base_url}/{path.lstrip('/')}"
+
+    def get(
+        self,
+        path: str,
+        params: Optional[dict] = None,
+        priority: int = PRIORITY_ESSENTIAL,
+        stale_ok: bool = True,
+    ) -> ApiResponse:
+        """GET ``path`` (relative to the API root or absolute), revalidating by ETag."""
+        url = self.url(path)
+        key = requests.Request("GET", url, params=params).prepare().url
+
+        with self._lock:
+            if key in self._seen:
+                return self._seen[key]
+            entry = self._etags.get(key)
+
+        try:
+            self.acquire(self.resource_for(url), priority)
+            headers = {"If-None-Match": entry["etag"]} if entry else {}
+            with stage_timer("api", method="GET", url=key) as span:
+                resp = self.session.get(
+                    url, params=params, headers=headers, timeout=self.timeout
+                )
+                span.update(status=resp.status_code, bytes=response_size(resp))
+            self._note_rate_limit(resp.headers)
+
+            if resp.status_code == 304 and entry:
+                headers = requests.structures.CaseInsensitiveDict(entry["headers"])
+                headers.update(resp.headers)
+                result = ApiResponse(entry["data"], 200, headers, cached=True)
+            else:
+                resp.raise_for_status()
+                # 204 No Content, e.g. the contributors of an empty repository
+                data = resp.json() if resp.content else None
+                result = ApiResponse(data, resp.status_code, resp.headers)
+                etag = resp.headers.get("ETag")
+                if etag:
+                    with self._lock:
+                        self._etags[key] = {
+                            "etag": etag,
+                            "data": result.data,
+                            "headers": {"Link": resp.headers.get("Link", "")},
+                        }
+        except requests.exceptions.RequestException as e:
+            if not (entry and stale_ok):
+                raise
+            print(f"   Warning: using cached {url.split('?')[0]} ({e})")
+            result = ApiResponse(
+                entry["data"],
+                200,
+                requests.structures.CaseInsensitiveDict(entry["headers"]),
+                cached=True,
+                stale=True,
+            )
+
+        with self._lock:
+            self._seen[key] = result
+        return result
+
+    def resource_for(self, url: str) -> str:
+        """Rate-limit bucket a request to ``url`` is charged to."""
+        path = urlparse(url).path
+        if path.rstrip("/").endswith("/graphql"):
+            return "graphql"
+        if "/search/" in path:
+            return "search"
+        return "core"
+
+    def acquire(self, resource: str, priority: int = PRIORITY_ESSENTIAL):
+        """
+        Take one request from ``resource``'s budget.
+
+        Waits for the window to reset when that is at most ``max_wait`` seconds
+        away, and raises RateLimitExceeded otherwise.
+        """
+        with self._lock:
+            limits = self.rate_limits.get(resource)
+            if limits is None:
+                return
+            wait = limits["reset"] - time.time()
+            if (
+                wait <= 0
+                or limits["remaining"] > limits["limit"] * RATE_RESERVE[priority]
+            ):
+                # Count the request now so concurrent callers see it too
+                limits["remaining"] -= 1
+                return
+
+        if wait > self.max_wait:
+            raise RateLimitExceeded(
+                f"{resource} rate limit at {limits['remaining']}/{limits['limit']}, "
+                f"resets in {wait:.0f}s"
+            )
+        print(f"   Waiting {wait:.0f}s for the {resource} rate limit to reset...")
+        time.sleep(wait + 1)
+        with self._lock:
+            self.rate_limits.pop(resource, None)
+
+    def _note_rate_limit(self, headers):
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        resource = headers.get("X-RateLimit-Resource", "core")
+        with self._lock:
+            self.rate_limits[resource] = {
+                "remaining": int(remaining),
+                "limit": int(headers.get("X-RateLimit-Limit", 0)),
+                "reset": int(headers.get("X-RateLimit-Reset", 0)),
+            }
+
+    def graphql(self, query: str, variables: Optional[dict] = None) -> dict:
+        """POST a GraphQL query and return its ``data`` object."""
+        self.acquire("graphql")
+        with stage_timer("api", method="POST", url=self.graphql_url) as span:
+            resp = self.session.post(
+                self.graphql_url,
+                json={"query": query, "variables": variables or {}},
+                timeout=self.timeout,
+            )
+            span.update(status=resp.status_code, bytes=response_size(resp))
+        self._note_rate_limit(resp.headers)
+        resp.raise_for_status()
+        payload = resp.json()
+        if payload.get("errors"):
+            messages = "; ".join(e.get("message", "?") for e in payload["errors"])
+            raise GraphQLError(messages, response=resp)
+        return payload["data"]
+
+    def get_many(self, calls: Dict[str, tuple]) -> Dict[str, ApiResponse]:
+        """
+        Fetch independent resources concurrently.
+
+        ``calls`` maps a name to ``(path, params)`` or ``(path, params,
+        priority)``; the result maps the same names to their responses, or to
+        the exception that request raised.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                name: pool.submit(self.get, *call) for name, call in calls.items()
+            }
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except requests.exceptions.RequestException as e:
+                results[name] = e
+        return results
+
+    def get_pages(
+        self,
+        path: str,
+        params: dict,
+        first: Optional[ApiResponse] = None,
+        priority: int = PRIORITY_ESSENTIAL,
+        stale_ok: bool = True,
+        concurrent: bool = True,
+    ) -> list:
+        """
+        Fetch every page of a paginated list endpoint and return the items in order.
+
+        The page count comes from the ``rel="last"`` link of the first page,
+        so pages 2..N are requested concurrently instead of one after another.
+        Callers that already run on the client's worker pool pass
+        ``concurrent=False`` so they do not open a second pool. Servers that
+        omit the ``Link`` header are walked page by page until a short page
+        comes back.
+        """
+        per_page = params.get("per_page", 30)
+        if first is None:
+            first = self.get(path, {**params, "page": 1}, priority, stale_ok)
+        items = list(first.data or [])
+
+        last = first.links.get("last")
+        if last:
+            query = parse_qs(urlparse(last["url"]).query)
+            last_page = int(query.get("page", ["1"])[0])
+            if not concurrent:
+                for page in range(2, last_page + 1):
+                    items.extend(
+                        self.get(
+                            path, {**params, "page": page}, priority, stale_ok
+                        ).data
+                        or []
+                    )
+                return items
+            pages = self.get_many(
+                {
+                    page: (path, {**params, "page": page}, priority, stale_ok)
+                    for page in range(2, last_page + 1)
+                }
+            )
+            for page in range(2, last_page + 1):
+                if isinstance(pages[page], Exception):
+                    raise pages[page]
+                items.extend(pages[page].data or [])
+            return items
+
+        page, data = 1, items
+        while len(data) >= per_page:
+            page += 1
+            data = (
+                self.get(path, {**params, "page": page}, priority, stale_ok).data or []
+            )
+            items.extend(data)
+        return items
+
+
+_client: Optional[GitHubClient] = None
+
+
+def get_client() -> GitHubClient:
+    """Return the process-wide API client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = GitHubClient()
+    return _client
+
+
+FULL_SYNC_INTERVAL = datetime.timedelta(days=7)
+HISTORY_FIELDS = (
+    "stars",
+    "forks",
+    "open_issues",
+    "followers",
+    "repos",
+    "prs",
+    "contributors",
+)
+
+
+class SnapshotStore:
+    """
+    SQLite store of per-repository counters and a history of profile metrics.
+
+    Repositories are keyed by id and remember the ``updated_at`` they were
+    last seen with. Because the repository listing is sorted by
+    ``updated_at``, a run only has to read it until the first repository the
+    store already has at that version; everything after it is unchanged.
+    Deleted or hidden repositories never show up as "changed", so the whole
+    listing is re-read every ``FULL_SYNC_INTERVAL`` to drop them.
+    """
+
+    def __init__(self, path: Path = CACHE_DIR / "metrics.sqlite3"):
+        self.path = path
+        if str(path) != ":memory:":
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path))
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS repos (
+                login TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                full_name TEXT,
+                updated_at TEXT,
+                pushed_at TEXT,
+                stars INTEGER NOT NULL DEFAULT 0,
+                forks INTEGER NOT NULL DEFAULT 0,
+                open_issues INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (login, id)
+            );
+            CREATE TABLE IF NOT EXISTS history (
+                login TEXT NOT NULL,
+                taken_at TEXT NOT NULL,
+                stars INTEGER,
+                forks INTEGER,
+                open_issues INTEGER,
+                followers INTEGER,
+                repos INTEGER,
+                prs INTEGER,
+                contributors INTEGER,
+                api TEXT
+            );
+            CREATE TABLE IF NOT EXISTS contributor_scans (
+                login TEXT NOT NULL,
+                repo_id INTEGER NOT NULL,
+                pushed_at TEXT,
+                PRIMARY KEY (login, repo_id)
+            );
+            CREATE TABLE IF NOT EXISTS contributors (
+                login TEXT NOT NULL,
+                repo_id INTEGER NOT NULL,
+                contributor TEXT NOT NULL,
+                PRIMARY KEY (login, repo_id, contributor)
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                login TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT,
+                PRIMARY KEY (login, key)
+            );
+            """)
+
+    def close(self):
+        self.db.close()
+
+    def repo_versions(self, login: str) -> Dict[int, str]:
+        rows = self.db.execute(
+            "SELECT id, updated_at FROM repos WHERE login = ?", (login,)
+        )
+        return dict(rows)
+
+    def needs_full_sync(self, login: str) -> bool:
+        row = self.db.execute(
+            "SELECT value FROM meta WHERE login = ? AND key = 'last_full_sync'",
+            (login,),
+        ).fetchone()
+        if not row:
+            return True
+        last = datetime.datetime.fromisoformat(row[0])
+        return datetime.datetime.now(datetime.timezone.utc) - last > FULL_SYNC_INTERVAL
+
+    def upsert_repos(self, login: str, repos: list, full: bool = False):
+        """Store ``repos``; with ``full`` they are the complete listing and replace it."""
+        with self.db:
+            if full:
+                self.db.execute("DELETE FROM repos WHERE login = ?", (login,))
+            self.db.executemany(
+                "INSERT OR REPLACE INTO repos VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        login,
+                        repo["id"],
+                        repo.get("full_name"),
+                        repo.get("updated_at"),
+                        repo.get("pushed_at"),
+                        repo.get("stargazers_count", 0),
+                        repo.get("forks_count", 0),
+                        repo.get("open_issues_count", 0),
+                    )
+                    for repo in repos
+                ],
+            )
+            if full:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO meta VALUES (?, 'last_full_sync', ?)",
+                    (login, _utcnow()),
+                )
+
+    def repos_to_scan(self, login: str) -> list:
+        """Repositories pushed to since their contributors were last listed."""
+        return self.db.execute(
+            "SELECT r.id, r.full_name, r.pushed_at FROM repos r "
+            "LEFT JOIN contributor_scans s ON s.login = r.login AND s.repo_id = r.id "
+            "WHERE r.login = ? AND (s.repo_id IS NULL OR s.pushed_at IS NOT r.pushed_at) "
+            "ORDER BY r.pushed_at DESC",
+            (login,),
+        ).fetchall()
+
+    def set_contributors(
+        self, login: str, repo_id: int, pushed_at: Optional[str], contributors
+    ):
+        with self.db:
+            self.db.execute(
+                "DELETE FROM contributors WHERE login = ? AND repo_id = ?",
+                (login, repo_id),
+            )
+            self.db.executemany(
+                "INSERT OR IGNORE INTO contributors VALUES (?, ?, ?)",
+                [(login, repo_id, c) for c in contributors],
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO contributor_scans VALUES (?, ?, ?)",
+                (login, repo_id, pushed_at),
+            )
+
+    def contributor_count(self, login: str) -> int:
+        """Distinct contributors across the repositories currently tracked."""
+        (count,) = self.db.execute(
+            "SELECT COUNT(DISTINCT c.contributor) FROM contributors c "
+            "JOIN repos r ON r.login = c.login AND r.id = c.repo_id "
+            "WHERE c.login = ?",
+            (login,),
+        ).fetchone()
+        return count
+
+    def totals(self, login: str) -> Dict[str, int]:
+        count, stars, forks, open_issues = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(stars), 0), COALESCE(SUM(forks), 0), "
+            "COALESCE(SUM(open_issues), 0) FROM repos WHERE login = ?",
+            (login,),
+        ).fetchone()
+        return {
+            "tracked": count,
+            "stars": stars,
+            "forks": forks,
+            "open_issues": open_issues,
+        }
+
+    def record(self, login: str, metrics: Dict[str, int], api: str = "rest"):
+        """Append one point to the metrics time series, noting the API it came from."""
+        with self.db:
+            self.db.execute(
+                "INSERT INTO history VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    login,
+                    _utcnow(),
+                    *(metrics.get(k, 0) for k in HISTORY_FIELDS),
+                    api,
+                ),
+            )
+
+    def latest(self, login: str) -> Optional[Dict[str, int]]:
+        """The most recently recorded metrics for ``login``, if any."""
+        rows = self.history(login, limit=1)
+        return rows[0] if rows else None
+
+    def history(self, login: str, limit: Optional[int] = None) -> list:
+        """Recorded metrics for ``login``, oldest first."""
+        rows = self.db.execute(
+            "SELECT taken_at, api, %s FROM history WHERE login = ? "
+            "ORDER BY taken_at DESC LIMIT ?" % ", ".join(HISTORY_FIELDS),
+            (login, -1 if limit is None else limit),
+        ).fetchall()
+        return [
+            {"taken_at": row[0], "api": row[1], **dict(zip(HISTORY_FIELDS, row[2:]))}
+            for row in reversed(rows)
+        ]
+
+
+def _utcnow() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+
+
+_store: Optional[SnapshotStore] = None
+
+
+def get_store() -> SnapshotStore:
+    """Return the process-wide snapshot store, opening it on first use."""
+    global _store
+    if _store is None:
+        _store = SnapshotStore()
+    return _store
+
+
+def sync_repositories(
+    client: GitHubClient,
+    store: SnapshotStore,
+    path: str,
+    params: dict,
+    first: ApiResponse,
+    full_sync: bool = False,
+    login: str = GITHUB_USERNAME,
+) -> int:
+    """
+    Bring the store's copy of the repository listing at ``path`` up to date.
+
+    Returns how many repositories were (re)written.
+    """
+    if full_sync or store.needs_full_sync(login):
+        repos = client.get_pages(path, params, first=first)
+        store.upsert_repos(login, repos, full=True)
+        return len(repos)
+
+    known = store.repo_versions(login)
+    changed = []
+    page, repos_page = 1, first.data
+    while repos_page:
+        for repo in repos_page:
+            if repo["id"] in known and known[repo["id"]] == repo.get("updated_at"):
+                store.upsert_repos(login, changed)
+                return len(changed)
+            changed.append(repo)
+
+        if len(repos_page) < params["per_page"]:
+            break
+        page += 1
+        repos_page = client.get(path, {**params, "page": page}).data
+
+    store.upsert_repos(login, changed)
+    return len(changed)
+
+
+def update_contributors(
+    client: GitHubClient, store: SnapshotStore, login: str = GITHUB_USERNAME
+) -> int:
+    """
+    Re-list the contributors of every repository whose ``pushed_at`` moved.
+
+    Repositories are fanned out over the client's worker pool at low
+    priority, and each one walks its pages in turn, so no more than
+    ``max_workers`` requests are in flight. Once the scheduler stops handing
+    out core budget the remaining ones are left for a later run, which picks
+    them up because their scan is still out of date. Anonymous contributors are counted by email.
+    Returns how many repositories were scanned.
+    """
+    pending = store.repos_to_scan(login)
+    if not pending:
+        return 0
+
+    def scan(repo):
+        repo_id, full_name, pushed_at = repo
+        try:
+            entries = client.get_pages(
+                f"repos/{full_name}/contributors",
+                {"per_page": 100, "anon": 1},
+                priority=PRIORITY_LOW,
+                stale_ok=False,
+                concurrent=False,
+            )
+        except RateLimitExceeded:
+            return None
+        except requests.exceptions.RequestException as e:
+            # e.g. 403 for histories too large to list; keep the previous scan
+            print(f"   Warning: Could not list contributors of {full_name}: {e}")
+            return None
+        names = {
+            entry.get("login") or f"anon:{entry.get('email') or entry.get('name')}"
+            for entry in entries
+        }
+        return repo_id, pushed_at, names
+
+    scanned = 0
+    with ThreadPoolExecutor(max_workers=client.max_workers) as pool:
+        for result in pool.map(scan, pending):
+            if result is None:
+                continue
+            store.set_contributors(login, *result)
+            scanned += 1
+
+    if scanned < len(pending):
+        print(
+            f"   Contributors: {len(pending) - scanned} repositories left for the "
+            "next run (rate limit)"
+        )
+    return scanned
+
+
+def fetch_github_profile_metrics(
+    client: Optional[GitHubClient] = None,
+    store: Optional[SnapshotStore] = None,
+    full_sync: bool = False,
+    login: str = GITHUB_USERNAME,
+) -> Dict[str, int]:
+    """
+    Fetch REAL GitHub profile metrics using GitHub API.
+    Returns aggregated metrics across ALL user repositories.
+    """
+    print(f"\n[SEARCH] Fetching real GitHub profile metrics for {login}...")
+
+    client = client or get_client()
+    store = store or get_store()
+
+    # Get authenticated user or public user data
+    user_path = f"users/{login}"
+
+    # Fetch ALL repositories to aggregate metrics (not just one repo)
+    all_repos_path = f"users/{login}/repos"
+    params = {"per_page": 100, "type": "all", "sort": "updated"}
+
+    # Fetch PR count (profile-wide)
+    pr_params = {"q": f"author:{login} is:pr is:merged", "per_page": 1}
+
+    try:
+        # The profile, the first repo page and the PR search don't depend on
+        # each other, so they go out together.
+        first = client.get_many(
+            {
+                "user": (user_path, None),
+                "repos": (all_repos_path, {**params, "page": 1}),
+                "prs": ("search/issues", pr_params, PRIORITY_NORMAL),
+            }
+        )
+        for name in ("user", "repos"):
+            if isinstance(first[name], Exception):
+                raise first[name]
+
+        user_data = first["user"].data
+
+        # Extract profile-wide metrics
+        followers = user_data.get("followers", 0)
+        following = user_data.get("following", 0)
+        public_repos = user_data.get("public_repos", 0)
+
+        print(f"   Profile: {user_data.get('name', login)}")
+        print(
+            f"   Followers: {followers} | Following: {following} | Public Repos: {public_repos}"
+        )
+
+        # Only repositories updated since the last run are re-read
+        changed = sync_repositories(
+            client, store, all_repos_path, params, first["repos"], full_sync, login
+        )
+        totals = store.totals(login)
+
+        print(
+            f"   Fetched {changed} changed repositories ({totals['tracked']} tracked)..."
+        )
+
+        scanned = update_contributors(client, store, login)
+        if scanned:
+            print(f"   Listed contributors of {scanned} pushed-to repositories...")
+
+        # Aggregate metrics across ALL repos
+        total_stars = totals["stars"]
+        total_forks = totals["forks"]
+        # open_issues_count includes open PRs, GitHub counts them as issues
+        total_open_issues = totals["open_issues"]
+        total_prs = 0
+
+        if isinstance(first["prs"], Exception):
+            print(f"   Warning: Could not fetch PR count: {first['prs']}")
+            previous = store.latest(login)
+            if previous:
+                print(f"   Keeping the PR count recorded at {previous['taken_at']}")
+                total_prs = previous["prs"]
+        else:
+            total_prs = first["prs"].data.get("total_count", 0)
+
+        metrics = {
+            "stars": total_stars,
+            "forks": total_forks,
+            "open_issues": total_open_issues,
+            "followers": followers,
+            "repos": public_repos,
+            "prs": total_prs,
+            "contributors": store.contributor_count(login),
+        }
+
+        print_metrics_summary(metrics)
+        store.record(login, metrics)
+
+        return metrics
+
+    except requests.exceptions.RequestException as e:
+        print(f"   [WARNING] Error fetching from GitHub API: {e}")
+        previous = store.latest(login)
+        if previous:
+            print(f"   Using the last recorded metrics from {previous['taken_at']}")
+            return {field: previous[field] for field in HISTORY_FIELDS}
+        print("   No metrics recorded yet, using zeros")
+        return {
+            "stars": 0,
+            "forks": 0,
+            "open_issues": 0,
+            "followers": 0,
+            "repos": 0,
+            "prs": 0,
+            "contributors": 0,
+        }
+
+    finally:
+        try:
+            client.save()
+        except OSError as e:
+            print(f"   Warning: Could not save API cache: {e}")
+
+
+PROFILE_METRICS_QUERY = """
+query($login: String!, $cursor: String) {
+  user(login: $login) {
+    name
+    avatarUrl
+    followers { totalCount }
+    pullRequests(states: MERGED) { totalCount }
+    owned: repositories(privacy: PUBLIC, ownerAffiliations: OWNER) { totalCount }
+    repositories(first: 100, after: $cursor, privacy: PUBLIC) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        nameWithOwner
+        stargazerCount
+        forkCount
+        issues(states: OPEN) { totalCount }
+        pullRequests(states: OPEN) { totalCount }
+        mentionableUsers(first: 100) {
+          pageInfo { hasNextPage endCursor }
+          nodes { login }
+        }
+      }
+    }
+  }
+}
+"""
+
+MENTIONABLE_USERS_QUERY = """
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    mentionableUsers(first: 100, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes { login }
+    }
+  }
+}
+"""
+
+
+def fetch_mentionable_users(
+    client: GitHubClient, name_with_owner: str, cursor: str
+) -> set:
+    """The logins on a repository's ``mentionableUsers`` pages after ``cursor``."""
+    owner, name = name_with_owner.split("/", 1)
+    logins = set()
+    while cursor:
+        users = client.graphql(
+            MENTIONABLE_USERS_QUERY, {"owner": owner, "name": name, "cursor": cursor}
+        )["repository"]["mentionableUsers"]
+        logins.update(node["login"] for node in users["nodes"])
+        page_info = users["pageInfo"]
+        cursor = page_info["endCursor"] if page_info["hasNextPage"] else None
+    return logins
+
+
+def fetch_github_profile_metrics_graphql(
+    client: Optional[GitHubClient] = None,
+    store: Optional[SnapshotStore] = None,
+    login: str = GITHUB_USERNAME,
+) -> Optional[Dict[str, int]]:
+    """
+    Fetch the same profile metrics as the REST path from one paginated GraphQL query.
+
+    Only the counted fields are requested, so each page of 100 repositories is
+    a few kilobytes instead of the full repository objects. Like the REST
+    listing (``type=all``), stars, forks and issues add up the public
+    repositories the user owns or collaborates on, while ``repos`` counts
+    only the owned ones, as ``public_repos`` does.
+
+    GraphQL has no equivalent of the REST contributors list, so contributors
+    are the distinct ``mentionableUsers`` across those repositories: people
+    who committed, collaborate, or took part in an issue or pull request.
+    That is a broader count than REST's commit authors; the history table
+    records which API each point came from. Repositories with more than 100
+    of them are paged through with MENTIONABLE_USERS_QUERY.
+
+    Returns None when GraphQL isn't usable (no token, or the query failed) so
+    the caller can fall back to REST.
+    """
+    print(f"\n[SEARCH] Fetching real GitHub profile metrics for {login} (GraphQL)...")
+
+    client = client or get_client()
+    if "Authorization" not in client.session.headers:
+        print("   [WARNING] The GraphQL API needs GITHUB_TOKEN, falling back to REST")
+        return None
+
+    total_stars = 0
+    total_forks = 0
+    total_open_issues = 0
+    contributors = set()
+    cursor = None
+
+    try:
+        while True:
+            user = client.graphql(
+                PROFILE_METRICS_QUERY, {"login": login, "cursor": cursor}
+            )["user"]
+            repositories = user["repositories"]
+
+            for repo in repositories["nodes"]:
+                total_stars += repo["stargazerCount"]
+                total_forks += repo["forkCount"]
+                # REST's open_issues_count includes open PRs, keep the same meaning
+                total_open_issues += (
+                    repo["issues"]["totalCount"] + repo["pullRequests"]["totalCount"]
+                )
+                users = repo["mentionableUsers"]
+                contributors.update(node["login"] for node in users["nodes"])
+                if users["pageInfo"]["hasNextPage"]:
+                    contributors |= fetch_mentionable_users(
+                        client, repo["nameWithOwner"], users["pageInfo"]["endCursor"]
+                    )
+
+            page_info = repositories["pageInfo"]
+            if not page_info["hasNextPage"]:
+                break
+            cursor = page_info["endCursor"]
+
+    except (requests.exceptions.RequestException, KeyError, TypeError) as e:
+        print(f"   [WARNING] GraphQL query failed ({e}), falling back to REST")
+        return None
+
+    print(f"   Profile: {user.get('name') or login}")
+    print(f"   Fetched {user['owned']['totalCount']} owned repositories...")
+
+    metrics = {
+        "stars": total_stars,
+        "forks": total_forks,
+        "open_issues": total_open_issues,
+        "followers": user["followers"]["totalCount"],
+        "repos": user["owned"]["totalCount"],
+        "prs": user["pullRequests"]["totalCount"],
+        "contributors": len(contributors),
+    }
+
+    print_metrics_summary(metrics)
+    (store or get_store()).record(login, metrics, api="graphql")
+
+    return metrics
+
+
+def fetch_dashboard_metrics(
+    login: str = GITHUB_USERNAME, api: str = "rest", full_sync: bool = False
+) -> Dict[str, int]:
+    """
+    The metrics one dashboard shows, from the GraphQL API with ``api="graphql"``
+    (falling back to REST when it isn't usable) or from REST.
+    """
+    with stage_timer("fetch", profile=f"fetch-{login}", login=login):
+        metrics = None
+        if api == "graphql":
+            metrics = fetch_github_profile_metrics_graphql(login=login)
+        if metrics is None:
+            metrics = fetch_github_profile_metrics(full_sync=full_sync, login=login)
+
+    # Global user metrics (aggregated across all repos)
+    return {
+        "stars": metrics.get("stars", 0),
+        "forks": metrics.get("forks", 0),
+        "issues": metrics.get("open_issues", 0),
+        "followers": metrics.get("followers", 0),
+        "repos": metrics.get("repos", 0),
+        "prs": metrics.get("prs", 0),
+        "contributors": metrics.get("contributors", 0),
+    }
+
+
+def print_metrics_summary(metrics: Dict[str, int]):
+    print(f"\n[STATS] Aggregated Profile Metrics:")
+    print(f"   [*] Total Stars: {metrics['stars']:,}")
+    print(f"   [~] Total Forks: {metrics['forks']:,}")
+    print(f"   [!] Open Issues: {metrics['open_issues']:,}")
+    print(f"   [@] Followers: {metrics['followers']:,}")
+    print(f"   [R] Repositories: {metrics['repos']:,}")
+    print(f"   [M] Pull Requests: {metrics['prs']:,}")
+    if metrics.get("contributors"):
+        print(f"   [C] Contributors: {metrics['contributors']:,}")
+
+
+def get_github_avatar_url(
+    client: Optional[GitHubClient] = None, login: str = GITHUB_USERNAME
+) -> Optional[str]:
+    """Fetch the user's GitHub avatar URL (free if the profile was already fetched)."""
+    try:
+        client = client or get_client()
+        return client.get(f"users/{login}").data.get("avatar_url")
+    except Exception:
+        return None
@@ -0,0 +1,490 @@
+"""
+Local stand-in for the GitHub API, for testing and load-testing the fetch
+layer without a network.
+
+Serves the sample responses in ``fixtures/`` for the endpoints
+``metrics.fetch`` uses, synthesising an account with any number of
+repositories from the sample one. The fixtures are synthetic, written in
+the shape of GitHub's responses rather than captured from the live API.
+Responses carry paginated ``Link`` headers, ETags (``If-None-Match`` gets
+a 304) and ``X-RateLimit-*`` headers with working per-resource budgets,
+and latency and server errors can be injected. Point the client at it with ``GITHUB_API_URL``::
+
+    python -m metrics.mock_server --repos 10000 --latency 50 --error-rate 0.02
+    GITHUB_API_URL=http://127.0.0.1:8765 METRICS_CACHE_DIR=.cache-mock \\
+        python generate_metrics.py --fetch-only
+
+Only needs the standard library.
+"""
+
+import argparse
+import copy
+import datetime
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "fixtures"
+
+# Requests per window and resource, as GitHub grants an authenticated user
+RATE_LIMITS = {"core": 5000, "search": 30, "graphql": 5000}
+
+
+def load_fixture(name: str):
+    with open(FIXTURES_DIR / name, "r") as f:
+        return json.load(f)
+
+
+class MockGitHubServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server answering like ``api.github.com`` for one account.
+
+    The account is the sample one from ``fixtures/rest/user.json`` with
+    ``repos`` repositories, each a copy of ``fixtures/rest/repo.json`` with
+    its own id, name, counters and timestamps, listed newest ``updated_at``
+    first like ``sort=updated``. Every tenth repository is empty, so its
+    contributors come back as a 204. GraphQL replays the pages of
+    ``fixtures/graphql/`` by cursor, and by repository name for the
+    ``mentionableUsers`` follow-up query.
+
+    Each response is delayed by ``latency`` plus up to ``jitter`` seconds,
+    and a share ``error_rate`` of them is answered with one of
+    ``error_statuses`` instead (a 503 comes with ``Retry-After``). The
+    ``stats`` counter tallies responses by status and resource.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        address: Tuple[str, int] = ("127.0.0.1", 0),
+        login: Optional[str] = None,
+        repos: Optional[int] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_statuses: Tuple[int, ...] = (502,),
+        rate_limits: Optional[dict] = None,
+        reset_window: float = 3600,
+        seed: int = 0,
+    ):
+        super().__init__(address, MockGitHubHandler)
+        self.user = load_fixture("rest/user.json")
+        self.login = login or self.user["login"]
+        self.user["login"] = self.login
+        self.repos = self.user["public_repos"] if repos is None else repos
+        self.user["public_repos"] = self.repos
+        self.repo_template = load_fixture("rest/repo.json")
+        self.contributors = load_fixture("rest/contributors.json")
+        self.search_issues = load_fixture("rest/search_issues.json")
+
+        graphql_pages = [
+            load_fixture("graphql/profile_metrics_page1.json"),
+            load_fixture("graphql/profile_metrics_page2.json"),
+        ]
+        # Each page is served for the end cursor of the one before it
+        cursors = [None] + [
+            page["data"]["user"]["repositories"]["pageInfo"]["endCursor"]
+            for page in graphql_pages[:-1]
+        ]
+        self.graphql_pages = dict(zip(cursors, graphql_pages))
+        # Repositories whose mentionableUsers run past the first page get
+        # their second one from MENTIONABLE_USERS_QUERY
+        self.mentionable_pages = {
+            (
+                node["nameWithOwner"].split("/", 1)[1],
+                node["mentionableUsers"]["pageInfo"]["endCursor"],
+            ): load_fixture("graphql/mentionable_users_page2.json")
+            for page in graphql_pages
+            for node in page["data"]["user"]["repositories"]["nodes"]
+            if node["mentionableUsers"]["pageInfo"]["hasNextPage"]
+        }
+
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.rate_limits = {**RATE_LIMITS, **(rate_limits or {})}
+        self.reset_window = reset_window
+        self.stats = Counter()
+
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._updated = datetime.datetime.strptime(
+            self.repo_template["updated_at"], "%Y-%m-%dT%H:%M:%SZ"
+        )
+        self._budgets = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockGitHubServer":
+        """Serve from a daemon thread; stop with ``shutdown()``."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def repo(self, index: int) -> dict:
+        """The ``index``-th repository of the listing, newest first."""
+        repo = copy.deepcopy(self.repo_template)
+        name = f"repo-{index:05d}"
+        updated = self._updated - datetime.timedelta(hours=index)
+        repo.update(
+            id=self.repo_template["id"] + index,
+            name=name,
+            full_name=f"{self.login}/{name}",
+            html_url=f"https://github.com/{self.login}/{name}",
+            url=f"{self.url}/repos/{self.login}/{name}",
+            updated_at=updated.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            pushed_at=(updated - datetime.timedelta(seconds=4)).strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            ),
+            size=0 if index % 10 == 9 else self.repo_template["size"],
+            stargazers_count=index % 7,
+            watchers_count=index % 7,
+            watchers=index % 7,
+            forks_count=index % 3,
+            forks=index % 3,
+            open_issues_count=index % 5 // 4,
+            open_issues=index % 5 // 4,
+        )
+        repo["owner"]["login"] = self.login
+        return repo
+
+    def pause(self):
+        delay = self.latency
+        if self.jitter:
+            with self._lock:
+                delay += self._random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def inject_error(self) -> Optional[int]:
+        """A status to fail this request with, drawn at ``error_rate``."""
+        if not self.error_rate:
+            return None
+        with self._lock:
+            if self._random.random() >= self.error_rate:
+                return None
+            return self._random.choice(self.error_statuses)
+
+    def charge(self, resource: str, spend: bool = True) -> Tuple[bool, dict]:
+        """
+        Take one request from ``resource``'s budget.
+
+        Returns whether the budget was already spent, so the request is
+        refused, and the rate-limit headers to answer with. ``spend=False``
+        only reports the budget, as for a 304. The window starts with the
+        first request and renews ``reset_window`` seconds later.
+        """
+        now = time.time()
+        with self._lock:
+            budget = self._budgets.get(resource)
+            if budget is None or budget["reset"] <= now:
+                budget = self._budgets[resource] = {
+                    "used": 0,
+                    "reset": int(now + self.reset_window),
+                }
+            limit = self.rate_limits[resource]
+            refused = spend and budget["used"] >= limit
+            if spend and not refused:
+                budget["used"] += 1
+            return refused, {
+                "X-RateLimit-Limit": str(limit),
+                "X-RateLimit-Remaining": str(0 if refused else limit - budget["used"]),
+                "X-RateLimit-Used": str(budget["used"]),
+                "X-RateLimit-Reset": str(budget["reset"]),
+                "X-RateLimit-Resource": resource,
+            }
+
+
+class MockGitHubHandler(BaseHTTPRequestHandler):
+    """Routes one request to the sample response for its endpoint."""
+
+    # Keep-alive, so the client's connection pool is exercised like upstream
+    protocol_version = "HTTP/1.1"
+    server: MockGitHubServer
+
+    ROUTES = (
+        (re.compile(r"/users/(?P<login>[^/]+)/repos"), "repos"),
+        (re.compile(r"/users/(?P<login>[^/]+)"), "user"),
+        (
+            re.compile(r"/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)/contributors"),
+            "contrib",
+        ),
+        (re.compile(r"/search/issues"), "search"),
+    )
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        resource = "search" if url.path.startswith("/search/") else "core"
+        self.server.pause()
+
+        status = self.server.inject_error()
+        if status:
+            return self.send_error_status(status, resource)
+
+        for pattern, route in self.ROUTES:
+            match = pattern.fullmatch(url.path.rstrip("/"))
+            if match:
+                break
+        else:
+            return self.send_json(404, load_fixture("rest/not_found.json"), resource)
+
+        owner = match.groupdict().get("login") or match.groupdict().get("owner")
+        if owner and owner.lower() != self.server.login.lower():
+            return self.send_json(404, load_fixture("rest/not_found.json"), resource)
+
+        links = None
+        if route == "user":
+            data = self.server.user
+        elif route == "repos":
+            page, per_page, links = self.page(query, self.server.repos)
+            start = (page - 1) * per_page
+            data = [
+                self.server.repo(i)
+                for i in range(start, min(start + per_page, self.server.repos))
+            ]
+        elif route == "contrib":
+            index = self.repo_index(match["name"])
+            if index is None:
+                return self.send_json(
+                    404, load_fixture("rest/not_found.json"), resource
+                )
+            if index % 10 == 9:
+                return self.send_json(204, None, resource)
+            page, per_page, links = self.page(query, len(self.server.contributors))
+            data = self.server.contributors[(page - 1) * per_page :][:per_page]
+        else:
+            data = self.server.search_issues
+
+        self.send_json(200, data, resource, links)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.pause()
+        if urlparse(self.path).path.rstrip("/") != "/graphql":
+            return self.send_json(404, load_fixture("rest/not_found.json"), "core")
+
+        status = self.server.inject_error()
+        if status:
+            return self.send_error_status(status, "graphql")
+
+        refused, limits = self.server.charge("graphql")
+        if refused:
+            # GraphQL reports an exhausted budget in the payload, with a 200
+            return self.send_json(
+                200, load_fixture("graphql/profile_metrics_error.json"), limits=limits
+            )
+
+        try:
+            variables = json.loads(body or b"{}").get("variables") or {}
+        except ValueError:
+            variables = None
+        if variables is None:
+            data = {"errors": [{"message": "Problems parsing JSON"}]}
+            return self.send_json(400, data, limits=limits)
+
+        if "name" in variables:
+            page = self.server.mentionable_pages.get(
+                (variables["name"], variables.get("cursor"))
+            )
+        else:
+            page = self.server.graphql_pages.get(variables.get("cursor"))
+        if page is None:
+            page = {
+                "data": None,
+                "errors": [
+                    {
+                        "type": "INVALID_CURSOR_ARGUMENTS",
+                        "message": f"`{variables.get('cursor')}` does not appear "
+                        "to be a valid cursor.",
+                    }
+                ],
+            }
+        self.send_json(200, page, limits=limits)
+
+    def page(self, query: dict, total: int):
+        """
+        Page number, page size and ``Link`` header for a list of ``total``.
+
+        Like GitHub, ``per_page`` defaults to 30 and is capped at 100, and
+        ``prev``/``first`` and ``next``/``last`` links are only present when
+        there is such a page.
+        """
+        try:
+            per_page = min(100, max(1, int(query.get("per_page", 30))))
+            page = max(1, int(query.get("page", 1)))
+        except ValueError:
+            per_page, page = 30, 1
+        last = max(1, -(-total // per_page))
+
+        def link(n, rel):
+            params = urlencode({**query, "page": n})
+            path = urlparse(self.path).path
+            return f'<http://{self.headers["Host"]}{path}?{params}>; rel="{rel}"'
+
+        links = []
+        if page > 1:
+            links += [link(page - 1, "prev"), link(1, "first")]
+        if page < last:
+            links += [link(page + 1, "next"), link(last, "last")]
+        return page, per_page, ", ".join(links) or None
+
+    def repo_index(self, name: str) -> Optional[int]:
+        match = re.fullmatch(r"repo-(\d+)", name)
+        if match and int(match[1]) < self.server.repos:
+            return int(match[1])
+        return None
+
+    def send_error_status(self, status: int, resource: str):
+        headers = {"Retry-After": "1"} if status == 503 else {}
+        data = {"message": "Server Error" if status >= 500 else "Forbidden"}
+        self.send_json(status, data, resource, extra=headers)
+
+    def send_json(
+        self,
+        status: int,
+        data,
+        resource: Optional[str] = None,
+        links: Optional[str] = None,
+        limits: Optional[dict] = None,
+        extra: Optional[dict] = None,
+    ):
+        """
+        Answer with ``data`` as JSON, or a 304 when the client's
+        ``If-None-Match`` still matches it.
+
+        A 304 leaves the rate-limit budget alone, as upstream. Once the
+        budget is spent, requests are refused with the sample 403.
+        """
+        body = b"" if data is None else json.dumps(data, indent=2).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        not_modified = status == 200 and self.headers.get("If-None-Match") == etag
+
+        if limits is None and resource is not None:
+            refused, limits = self.server.charge(resource, spend=not not_modified)
+            if refused:
+                status, not_modified = 403, False
+                body = json.dumps(load_fixture("rest/rate_limited.json")).encode()
+        if not_modified:
+            status, body = 304, b""
+
+        # Counted before answering, so the client never sees a stale tally
+        with self.server._lock:
+            self.server.stats[status] += 1
+            self.server.stats[resource or "graphql"] += 1
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if status in (200, 304):
+            self.send_header("ETag", etag)
+        if links and status == 200:
+            self.send_header("Link", links)
+        for name, value in {**(limits or {}), **(extra or {})}.items():
+            self.send_header(name, value)
+        if status not in (204, 304):
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status not in (204, 304):
+            self.wfile.write(body)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--port", type=int, default=8765, help="port to listen on (0: any free one)"
+    )
+    parser.add_argument("--login", help="account to serve (default: the sample one)")
+    parser.add_argument(
+        "--repos",
+        type=int,
+        help="repositories in the account (default: the sample count)",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0, help="delay per response in ms"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0, help="extra random delay of up to N ms"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0,
+        help="share of requests answered with an error status (0 to 1)",
+    )
+    parser.add_argument(
+        "--error-status",
+        type=int,
+        nargs="+",
+        default=[502],
+        metavar="STATUS",
+        help="statuses the injected errors are drawn from (default: 502)",
+    )
+    for resource, limit in RATE_LIMITS.items():
+        parser.add_argument(
+            f"--{resource}-limit",
+            type=int,
+            default=limit,
+            help=f"{resource} requests per rate-limit window (default: {limit})",
+        )
+    parser.add_argument(
+        "--reset-window",
+        type=float,
+        default=3600,
+        help="seconds until a rate-limit window renews (default: 3600)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the injections")
+    args = parser.parse_args(argv)
+
+    server = MockGitHubServer(
+        (args.host, args.port),
+        login=args.login,
+        repos=args.repos,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        error_statuses=args.error_status,
+        rate_limits={r: getattr(args, f"{r}_limit") for r in RATE_LIMITS},
+        reset_window=args.reset_window,
+        seed=args.seed,
+    )
+    print(
+        f"Mock GitHub API for {server.login} ({server.repos:,} repositories) "
+        f"at {server.url}"
+    )
+    print(f"   GITHUB_API_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(
+            "\n[STATS] Responses: "
+            + ", ".join(
+                f"{key}: {count:,}"
+                for key, count in sorted(
+                    server.stats.items(), key=lambda item: str(item[0])
+                )
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
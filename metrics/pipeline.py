@@ -0,0 +1,866 @@
+"""
+Render pipeline: turns fetched metrics into the metric animations, the 2x2
+dashboard, its SVG embed and the vector SVGs, skipping assets the render
+manifest says are current.
+
+Every option lives on a ``Settings`` object, and pool jobs are plain tuples
+of picklable values, so workers need nothing inherited from the parent.
+"""
+
+import contextlib
+import functools
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from . import encode, render
+from .encode import (
+    ENCODERS,
+    GifEncoder,
+    GifWriter,
+    build_global_palette,
+    forward_frames,
+    iter_gif_frames,
+    iter_spooled_frames,
+    quantize_frame,
+    sample_indices,
+)
+from .render import (
+    Colors,
+    FollowerVisualizer,
+    ForkVisualizer,
+    IssueVisualizer,
+    MetricVisualizer,
+    StarVisualizer,
+    compose_2x2_grid,
+    create_svg_embedded_gif,
+    create_vector_svg,
+    load_fonts,
+)
+from .timing import stage_timer
+
+# Every palette entry of the four dashboard metrics, kept exact in its palette
+DASHBOARD_COLORS = [
+    c
+    for pal in (Colors.STAR, Colors.FORK, Colors.ISSUE, Colors.FOLLOWER)
+    for c in pal.values()
+]
+
+
+class Settings:
+    """
+    Render options of one run, as given on the command line.
+
+    The defaults are the "default" preset (see PRESETS). ``encoders`` whose
+    dependencies are missing are left out of ``extra_formats`` with a
+    warning.
+    """
+
+    # Design space of every visualizer; ``scale`` sizes it on output
+    w, h = 600, 300
+
+    def __init__(
+        self,
+        scale: float = 1.0,
+        frames: int = 40,
+        fps: int = 15,
+        dashboard_fps: int = 12,
+        dither: bool = False,
+        delta: bool = True,
+        loop: str = "crossfade",
+        output_format: str = "gif",
+        encoders=("gif",),
+        measure: bool = False,
+        tiles: int = 1,
+        jobs: int = 1,
+        batch: bool = False,
+        force_render: bool = False,
+    ):
+        self.scale = scale
+        self.frames = frames
+        self.fps = fps
+        self.dashboard_fps = dashboard_fps
+        self.out_w, self.out_h = round(self.w * self.scale), round(self.h * self.scale)
+        self.dither = dither
+        self.delta = delta
+        self.loop = loop
+        self.pingpong = loop == "pingpong"
+        self.output_format = output_format
+        self.measure = measure
+        self.tiles = tiles
+        self.jobs = max(1, jobs)
+        self.batch = batch
+        self.force_render = force_render
+
+        # File extensions written next to each GIF, for the encoders that can run
+        self.extra_formats = []
+        for name in dict.fromkeys(encoders):
+            missing = ENCODERS[name].missing()
+            if missing:
+                print(f"  Warning: not writing {name}, the encoder {missing}")
+            elif name != "gif":
+                self.extra_formats.append(ENCODERS[name].EXTENSION)
+
+
+def preset(**options):
+    """The Settings options a preset sets, the unset ones at their defaults."""
+    defaults = Settings()
+    return {
+        name: options.get(name, getattr(defaults, name))
+        for name in ("scale", "frames", "fps", "dashboard_fps")
+    }
+
+
+# Output presets (--preset): scale of the 600x300 design, frames per loop and
+# frame rates. Render cost grows with scale**2 * frames.
+PRESETS = {
+    "thumbnail": preset(scale=0.5, frames=24, fps=12, dashboard_fps=10),
+    "default": preset(),
+    "retina": preset(scale=2.0),
+}
+
+
+# ============================================================
+# RENDER CACHE - skip assets whose inputs haven't changed
+# ============================================================
+
+SOURCE_HASH = hashlib.sha256(
+    b"".join(
+        Path(source).read_bytes()
+        for source in (__file__, encode.__file__, render.__file__)
+    )
+).hexdigest()
+
+
+def render_key(*parts):
+    """Content hash of everything that determines a rendered asset."""
+    blob = json.dumps([SOURCE_HASH, *parts], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def load_render_manifest(out_dir):
+    try:
+        with open(out_dir / "render_manifest.json", "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_render_manifest(out_dir, manifest):
+    with open(out_dir / "render_manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+# ============================================================
+# METRIC ANIMATIONS
+# ============================================================
+
+
+def output_dir(settings, login):
+    """Batch mode gives every login its own output directory."""
+    return Path("assets") / login if settings.batch else Path("assets")
+
+
+def asset_paths(settings, login, name, formats=None):
+    """Where one animation is written, in every format, GIF first."""
+    if formats is None:
+        formats = [GifEncoder.EXTENSION, *settings.extra_formats]
+    return [str(output_dir(settings, login) / f"{name}{ext}") for ext in formats]
+
+
+def spool_path(path):
+    """Where the RGB frames of the metric GIF at ``path`` are spooled for the
+    dashboard, until it is written (see dashboard_sources)."""
+    return f"{path}.rgb"
+
+
+def metric_jobs_for(metrics):
+    """The 4 metric animations of the 2x2 grid for one login's ``metrics``."""
+    return [
+        (
+            StarVisualizer,
+            Colors.STAR,
+            "[*] Total Stars",
+            metrics["stars"],
+            "metric_stars",
+        ),
+        (
+            ForkVisualizer,
+            Colors.FORK,
+            "[~] Total Forks",
+            metrics["forks"],
+            "metric_forks",
+        ),
+        (
+            IssueVisualizer,
+            Colors.ISSUE,
+            "[!] Open Issues",
+            metrics["issues"],
+            "metric_issues",
+        ),
+        (
+            FollowerVisualizer,
+            Colors.FOLLOWER,
+            "[@] Followers",
+            metrics["followers"],
+            "metric_followers",
+        ),
+    ]
+
+
+def init_worker(enabled, trace_path, profile_dir):
+    """Pool initializer: take over the parent's --profile settings."""
+    stage_timer.enabled = enabled
+    stage_timer.trace_path = trace_path
+    stage_timer.profile_dir = profile_dir
+
+
+def flushes_trace(job):
+    """Hand a pool job's --profile events to the parent through a part file."""
+
+    @functools.wraps(job)
+    def run(*job_args):
+        try:
+            return job(*job_args)
+        finally:
+            stage_timer.flush()
+
+    return run
+
+
+@flushes_trace
+def render_metric(job):
+    """
+    Render one metric animation in the given formats (all by default);
+    runs in a worker process with --jobs. Its RGB frames are spooled for
+    the dashboard.
+    """
+    settings, login, metrics, index, formats = job
+    cls, palette, label, value, name = metric_jobs_for(metrics)[index]
+    path, *extra_paths = asset_paths(settings, login, name, formats)
+    (gif,) = asset_paths(settings, login, name, [GifEncoder.EXTENSION])
+    return cls(settings.w, settings.h, palette, label, settings.scale).animate(
+        value,
+        path,
+        settings.frames,
+        settings.fps,
+        dither=settings.dither,
+        delta=settings.delta,
+        pingpong=settings.pingpong,
+        extra_paths=extra_paths,
+        measure=settings.measure,
+        spool=spool_path(gif),
+    )
+
+
+def tile_bounds(settings):
+    """Split the output rows into horizontal strips on 8-row boundaries.
+
+    Keeping strips 8-aligned lets the ordered dither line up across them.
+    """
+    out_h = settings.out_h
+    step = -(-out_h // max(1, settings.tiles))
+    step = -(-step // 8) * 8
+    return [(top, min(top + step, out_h)) for top in range(0, out_h, step)]
+
+
+@flushes_trace
+def render_tile(job):
+    """
+    Render one horizontal strip of a metric animation (--tiles).
+
+    The "samples" stage returns the strip's share of the palette sample
+    frames, every ``arg``-th row and column. The "frames" stage quantizes
+    every frame of the strip against the shared palette and spools the
+    indices to a raw file, one frame after another.
+    """
+    settings, metrics, index, bounds, stage, arg = job
+    cls, palette, label, value, _ = metric_jobs_for(metrics)[index]
+    visualizer = cls(
+        settings.w, settings.h, palette, label, settings.scale, tile=bounds
+    )
+
+    if stage == "samples":
+        stride = arg
+        picks = sample_indices(forward_frames(settings.frames, settings.pingpong))
+        return [
+            np.asarray(frame)[(-bounds[0]) % stride :: stride, ::stride]
+            for _, frame in visualizer.iter_frames(
+                value, settings.frames, only=picks, pingpong=settings.pingpong
+            )
+        ]
+
+    entries, spool_path = arg
+    gif_palette = Image.new("P", (1, 1))
+    gif_palette.putpalette(entries)
+    with open(spool_path, "wb") as spool:
+        for _, frame in visualizer.iter_frames(
+            value, settings.frames, pingpong=settings.pingpong
+        ):
+            spool.write(quantize_frame(frame, gif_palette, settings.dither).tobytes())
+
+
+def tiled_samples(settings, metrics, index, bounds, stride=1, mapper=map):
+    """Stitch each palette sample frame of a metric back together from its strips."""
+    strips = list(
+        mapper(
+            render_tile,
+            [(settings, metrics, index, b, "samples", stride) for b in bounds],
+        )
+    )
+    return [Image.fromarray(np.concatenate(rows)) for rows in zip(*strips)]
+
+
+def tiled_frames(settings, metrics, indices, bounds, gif_palette, stem, mapper=map):
+    """
+    Render the strips of the metrics ``indices`` against ``gif_palette``
+    and yield, frame by frame, the stitched palette indices of each one.
+
+    The strips are spooled to ``stem``.<index>.tile<k> files, removed
+    once the frames have been read back.
+    """
+    out_w, out_h = settings.out_w, settings.out_h
+    entries = gif_palette.getpalette()
+    spools = {i: [f"{stem}.{i}.tile{k}" for k in range(len(bounds))] for i in indices}
+    tile_jobs = [
+        (settings, metrics, i, b, "frames", (entries, spool))
+        for i in indices
+        for b, spool in zip(bounds, spools[i])
+    ]
+    try:
+        list(mapper(render_tile, tile_jobs))
+        with contextlib.ExitStack() as stack:
+            files = {
+                i: [stack.enter_context(open(spool, "rb")) for spool in spools[i]]
+                for i in indices
+            }
+            for _ in range(forward_frames(settings.frames, settings.pingpong)):
+                yield [
+                    np.concatenate(
+                        [
+                            np.frombuffer(f.read(out_w * (bottom - top)), np.uint8)
+                            for f, (top, bottom) in zip(files[i], bounds)
+                        ]
+                    ).reshape(out_h, out_w)
+                    for i in indices
+                ]
+    finally:
+        for spool in chain(*spools.values()):
+            if os.path.exists(spool):
+                os.remove(spool)
+
+
+def render_metric_tiled(settings, login, metrics, index, pool=None):
+    """Render one metric in strips and stitch the strips into its GIF.
+
+    The parent only ever holds one frame's palette indices, never a
+    full-resolution RGB frame.
+    """
+    cls, palette, label, value, name = metric_jobs_for(metrics)[index]
+    path = str(output_dir(settings, login) / f"{name}.gif")
+    bounds = tile_bounds(settings)
+    mapper = pool.map if pool is not None else map
+    print(f"  {label}: {value:,} ({settings.frames} frames, {len(bounds)} tiles)...")
+
+    gif_palette = build_global_palette(
+        [
+            tiled_samples(
+                settings, metrics, index, bounds, max(1, round(settings.scale)), mapper
+            )
+        ],
+        fixed_colors=palette.values(),
+    )
+    with GifWriter(
+        path,
+        gif_palette,
+        int(1000 / settings.fps),
+        delta=settings.delta,
+        pingpong=settings.pingpong,
+    ) as gif:
+        for (frame,) in tiled_frames(
+            settings, metrics, [index], bounds, gif_palette, path, mapper
+        ):
+            gif.add_frame(Image.fromarray(frame, "P"))
+    print(f"    Saved: {path}")
+
+
+@stage_timer("dashboard", profile="dashboard")
+def render_dashboard_tiled(settings, metrics, path, pool=None):
+    """Render the 2x2 dashboard GIF in strips, like render_metric_tiled().
+
+    Every cell is rendered again in strips and quantized against the
+    dashboard palette, and the grid is stitched from palette indices, so
+    no process holds a full-resolution RGB cell or grid frame.
+    """
+    bounds = tile_bounds(settings)
+    mapper = pool.map if pool is not None else map
+    indices = range(len(metric_jobs_for(metrics)))
+    print(f"  Building 2x2 grid dashboard ({len(bounds)} tiles per cell)...")
+
+    gif_palette = build_global_palette(
+        [
+            tiled_samples(
+                settings, metrics, i, bounds, max(1, round(settings.scale)), mapper
+            )
+            for i in indices
+        ],
+        fixed_colors=DASHBOARD_COLORS,
+    )
+    with GifWriter(
+        path,
+        gif_palette,
+        int(1000 / settings.dashboard_fps),
+        delta=settings.delta,
+        pingpong=settings.pingpong,
+    ) as gif:
+        for cells in tiled_frames(
+            settings, metrics, indices, bounds, gif_palette, path, mapper
+        ):
+            grid = np.block([[cells[0], cells[1]], [cells[2], cells[3]]])
+            gif.add_frame(Image.fromarray(grid, "P"))
+    print(f"    Saved: {path} ({gif.frames} frames)")
+
+
+def split_evenly(items, parts):
+    """Split ``items`` into at most ``parts`` contiguous, non-empty runs."""
+    items = list(items)
+    bounds = [k * len(items) // parts for k in range(parts + 1)]
+    return [items[a:b] for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+@flushes_trace
+def render_frames(job):
+    """
+    Render a run of one metric's frames, each on its own (see
+    render_metric_split). Without palette entries the frames come back
+    as RGB arrays for the palette; with them, as quantized index bytes,
+    and the RGB frames are written to their place in the ``spool`` file.
+    """
+    settings, metrics, index, indices, entries, spool = job
+    cls, palette, label, value, _ = metric_jobs_for(metrics)[index]
+    visualizer = cls(settings.w, settings.h, palette, label, settings.scale)
+    frames = visualizer.iter_frames(
+        value, settings.frames, only=indices, pingpong=settings.pingpong
+    )
+    if entries is None:
+        return [np.asarray(frame) for _, frame in frames]
+
+    gif_palette = Image.new("P", (1, 1))
+    gif_palette.putpalette(entries)
+    quantized = []
+    with open(spool, "r+b") as spooled:
+        spooled.seek(indices[0] * settings.out_w * settings.out_h * 3)
+        for _, frame in frames:
+            spooled.write(frame.tobytes())
+            quantized.append(
+                quantize_frame(frame, gif_palette, settings.dither).tobytes()
+            )
+    return quantized
+
+
+def render_metric_split(settings, login, metrics, index, pool):
+    """Render one metric with its frames spread over the pool.
+
+    Frames do not depend on each other, so the GIF, and the RGB frames
+    spooled for the dashboard, come out the same as from render_metric().
+    """
+    cls, palette, label, value, name = metric_jobs_for(metrics)[index]
+    path = str(output_dir(settings, login) / f"{name}.gif")
+    jobs = settings.jobs
+    print(f"  {label}: {value:,} ({settings.frames} frames, {jobs} workers)...")
+
+    rendered = forward_frames(settings.frames, settings.pingpong)
+    picks = sample_indices(rendered)
+    sample_jobs = [
+        (settings, metrics, index, run, None, None) for run in split_evenly(picks, jobs)
+    ]
+    samples = [
+        Image.fromarray(frame)
+        for run in pool.map(render_frames, sample_jobs)
+        for frame in run
+    ]
+    gif_palette = build_global_palette(
+        [samples], fixed_colors=palette.values(), stride=max(1, round(settings.scale))
+    )
+    del samples
+
+    # Every worker writes its run of frames into its part of the spool
+    spool = spool_path(path)
+    with open(spool, "wb") as f:
+        f.truncate(rendered * settings.out_w * settings.out_h * 3)
+    entries = gif_palette.getpalette()
+    frame_jobs = [
+        (settings, metrics, index, run, entries, spool)
+        for run in split_evenly(range(rendered), jobs)
+    ]
+    with GifWriter(
+        path,
+        gif_palette,
+        int(1000 / settings.fps),
+        delta=settings.delta,
+        pingpong=settings.pingpong,
+    ) as gif:
+        for run in pool.map(render_frames, frame_jobs):
+            for indices in run:
+                frame = np.frombuffer(indices, np.uint8).reshape(
+                    settings.out_h, settings.out_w
+                )
+                gif.add_frame(Image.fromarray(frame, "P"))
+    print(f"    Saved: {path}")
+
+
+def render_vector(settings, login, metrics, owner):
+    """Write the vector SVG of every metric and of the 2x2 dashboard."""
+    out_dir = output_dir(settings, login)
+    out_w, out_h = settings.out_w, settings.out_h
+    cells = []
+    for cls, palette, label, value, name in metric_jobs_for(metrics):
+        visualizer = cls(settings.w, settings.h, palette, label)
+        create_vector_svg(
+            [(visualizer, value)],
+            str(out_dir / f"{name}.svg"),
+            out_w,
+            out_h,
+            f"{owner} - {label}",
+            frames=settings.frames,
+            fps=settings.fps,
+        )
+        cells.append((visualizer, value))
+    create_vector_svg(
+        cells,
+        str(out_dir / "metrics_dashboard_vector.svg"),
+        out_w * 2,
+        out_h * 2,
+        f"{owner} - GitHub Profile Metrics",
+        f"GitHub profile metrics: {metrics['stars']:,} total stars, "
+        f"{metrics['forks']:,} total forks, {metrics['issues']:,} open issues, "
+        f"{metrics['followers']:,} followers across {metrics['repos']:,} "
+        "repositories",
+        frames=settings.frames,
+        fps=settings.fps,
+    )
+
+
+# ============================================================
+# DASHBOARD
+# ============================================================
+
+
+def dashboard_sources(settings, metrics, paths, rgb, spooled=()):
+    """
+    compose_2x2_grid() sources for the four metrics of the dashboard.
+
+    The metrics indexed in ``spooled`` were rendered in this run, and
+    their cells are read back from the RGB frames spooled next to their
+    GIFs. Those indexed in ``rgb`` are rendered again. Either way the
+    cells come from the exact frames; the others are decoded back from
+    their GIFs at ``paths``.
+    """
+    sources = []
+    for i, (cls, palette, label, value, _) in enumerate(metric_jobs_for(metrics)):
+        if i in spooled:
+            sources.append(
+                functools.partial(
+                    iter_spooled_frames,
+                    spool_path(paths[i]),
+                    (settings.out_w, settings.out_h),
+                )
+            )
+        elif i in rgb:
+            visualizer = cls(settings.w, settings.h, palette, label, settings.scale)
+            sources.append(
+                visualizer.frame_source(
+                    value, settings.frames, pingpong=settings.pingpong
+                )
+            )
+        else:
+            sources.append(
+                functools.partial(iter_gif_frames, paths[i], int(1000 / settings.fps))
+            )
+    return sources
+
+
+@flushes_trace
+def render_dashboard(settings, login, metrics, pool=None):
+    """
+    Bring one login's metric GIFs, dashboard and SVG embed up to date,
+    and write its vector SVGs with --format svg or both.
+
+    Stale metrics are rendered on ``pool`` when one is given. Returns the
+    encode results of everything rendered (see encode_results).
+    """
+    out_dir = output_dir(settings, login)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    metric_jobs = metric_jobs_for(metrics)
+    assets = [asset_paths(settings, login, name) for *_, name in metric_jobs]
+    paths = [gif for gif, *_ in assets]
+    dashboard_path, *dashboard_extras = asset_paths(
+        settings, login, "metrics_dashboard"
+    )
+    svg_path = str(out_dir / "metrics_dashboard.svg")
+    owner = login if settings.batch else "Marcelo Burgos"
+    extra_formats = settings.extra_formats
+    jobs = settings.jobs
+
+    if settings.output_format != "gif":
+        # Vector output is computed in closed form, so it is cheaper to
+        # rewrite than to check the render cache
+        with stage_timer("vector", profile="vector", login=login):
+            render_vector(settings, login, metrics, owner)
+        if settings.output_format == "svg":
+            return []
+
+    manifest = {} if settings.force_render else load_render_manifest(out_dir)
+    keys = {
+        name: render_key(
+            cls.__name__,
+            palette,
+            label,
+            value,
+            settings.w,
+            settings.h,
+            settings.scale,
+            settings.frames,
+            settings.fps,
+            settings.dither,
+            settings.delta,
+            settings.pingpong,
+            extra_formats,
+            # Tiled assets come from another code path; keep them apart
+            max(1, settings.tiles),
+        )
+        for cls, palette, label, value, name in metric_jobs
+    }
+    dashboard_key = render_key(
+        [keys[name] for *_, name in metric_jobs],
+        settings.dashboard_fps,
+        settings.dither,
+        settings.delta,
+        settings.pingpong,
+        extra_formats,
+    )
+    svg_key = render_key(dashboard_key, owner, metrics)
+
+    stale = [
+        i
+        for i, (*_, name) in enumerate(metric_jobs)
+        if manifest.get(name) != keys[name]
+        or not all(Path(p).exists() for p in assets[i])
+    ]
+    dashboard_fresh = (
+        not stale
+        and manifest.get("metrics_dashboard") == dashboard_key
+        and all(Path(p).exists() for p in [dashboard_path, *dashboard_extras])
+    )
+
+    if len(stale) < len(metric_jobs):
+        print(f"  {len(metric_jobs) - len(stale)} metric(s) unchanged, reusing assets")
+
+    results = []
+    # The GIF-only paths leave the other formats to render_metric()
+    remaining = None
+    if settings.tiles > 1:
+        # Strips of one metric are spread over the pool instead
+        for i in stale:
+            render_metric_tiled(settings, login, metrics, i, pool)
+        remaining = extra_formats
+    elif pool is not None and jobs > len(stale):
+        # More workers than metrics to render: the frames of each metric
+        # are spread over the pool instead
+        for i in stale:
+            render_metric_split(settings, login, metrics, i, pool)
+        remaining = extra_formats
+    metric_work = [
+        (settings, login, metrics, i, remaining) for i in stale if remaining != []
+    ]
+    if pool is not None and len(metric_work) > 1:
+        print(
+            f"  Rendering {len(stale)} metrics with {min(jobs, len(stale))} workers..."
+        )
+        for metric_results in pool.map(render_metric, metric_work):
+            results += metric_results
+    else:
+        for work in metric_work:
+            results += render_metric(work)
+    for i in stale:
+        name = metric_jobs[i][-1]
+        manifest[name] = keys[name]
+
+    if dashboard_fresh:
+        print("  Dashboard unchanged, skipping")
+    else:
+        dashboard_paths = [dashboard_path, *dashboard_extras]
+        # Metrics rendered in this run are read back from their spooled RGB
+        # frames, so the dashboard is quantized once, from the exact frames,
+        # without rendering them again. Metrics the cache reused are decoded
+        # from their GIFs.
+        rgb = ()
+        if settings.tiles > 1:
+            # The GIF is stitched from strips, like the metrics; the other
+            # formats still need whole frames, and those of reused metrics
+            # are rendered again
+            render_dashboard_tiled(settings, metrics, dashboard_path, pool)
+            dashboard_paths = dashboard_extras
+            rgb = range(len(paths))
+        try:
+            if dashboard_paths:
+                # Create 2x2 grid dashboard, streamed one grid frame at a time
+                results += compose_2x2_grid(
+                    dashboard_sources(settings, metrics, paths, rgb, stale),
+                    dashboard_paths[0],
+                    settings.frames,
+                    settings.dashboard_fps,
+                    cell_size=(settings.out_w, settings.out_h),
+                    fixed_colors=DASHBOARD_COLORS,
+                    dither=settings.dither,
+                    delta=settings.delta,
+                    pingpong=settings.pingpong,
+                    extra_paths=dashboard_paths[1:],
+                    measure=settings.measure,
+                    # PSNR is always taken against the exact frames
+                    reference_sources=(
+                        dashboard_sources(
+                            settings, metrics, paths, range(len(paths)), stale
+                        )
+                        if settings.measure
+                        else None
+                    ),
+                    stride=max(1, round(settings.scale)),
+                )
+        finally:
+            for i in stale:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(spool_path(paths[i]))
+        manifest["metrics_dashboard"] = dashboard_key
+
+    if manifest.get("metrics_dashboard_svg") != svg_key or not Path(svg_path).exists():
+        # Create SVG embed for web display
+        create_svg_embedded_gif(
+            dashboard_path,
+            svg_path,
+            metrics,
+            # Retina assets keep the default display size at twice the DPI
+            width=round(settings.w * 2 * min(settings.scale, 1)),
+            height=round(settings.h * 2 * min(settings.scale, 1)),
+            owner=owner,
+        )
+        manifest["metrics_dashboard_svg"] = svg_key
+
+    save_render_manifest(out_dir, manifest)
+    return results
+
+
+def render_all(settings, all_metrics):
+    """
+    Render the dashboard of every login in ``all_metrics`` (login ->
+    metrics), on a pool of ``settings.jobs`` worker processes when there
+    is more than one. Returns the encode results of everything rendered.
+    """
+    print("\n[ART] Generating high-resolution animations...")
+    # Shared setup, done once before any worker starts
+    load_fonts(MetricVisualizer.font_size_for(settings.out_h))
+
+    logins = list(all_metrics)
+    encoded = []
+    if settings.jobs == 1:
+        for login in logins:
+            encoded += render_dashboard(settings, login, all_metrics[login])
+    else:
+        with ProcessPoolExecutor(
+            max_workers=settings.jobs,
+            initializer=init_worker,
+            initargs=(
+                stage_timer.enabled,
+                stage_timer.trace_path,
+                stage_timer.profile_dir,
+            ),
+        ) as pool:
+            if settings.batch:
+                # Dashboards are spread over the workers, one login each
+                print(
+                    f"  Rendering {len(logins)} dashboards with {settings.jobs} "
+                    "workers..."
+                )
+                for results in pool.map(
+                    render_dashboard,
+                    repeat(settings),
+                    logins,
+                    [all_metrics[login] for login in logins],
+                ):
+                    encoded += results
+            else:
+                login = logins[0]
+                encoded += render_dashboard(settings, login, all_metrics[login], pool)
+
+    print("\n" + "=" * 60)
+    print("[OK] Done!")
+    if settings.batch:
+        dirs = ", ".join(str(output_dir(settings, login)) for login in logins)
+        print(f"   Dashboards: {dirs}")
+    print(
+        f"   Resolution: {settings.out_w}x{settings.out_h} per metric, "
+        f"{settings.out_w * 2}x{settings.out_h * 2} dashboard (2x2 grid)"
+    )
+    print("   Dashboard shows: Stars, Forks, Issues, Followers")
+    print("=" * 60)
+    return encoded
+
+
+def print_encode_report(settings, results, report_path=None):
+    """
+    Compare the encoders over every file rendered in this run, and save
+    the comparison as JSON to ``report_path`` (--encode-report).
+    """
+    print("\n[ENCODE] Output formats")
+    print(f"  {'file':<44}{'frames':>7}{'encode s':>10}{'KB':>9}{'PSNR dB':>9}")
+    by_asset = {}
+    for r in results:
+        psnr_db = r.get("psnr_db", "-")
+        print(
+            f"  {r['path']:<44}{r['frames']:>7}{r['seconds']:>10.2f}"
+            f"{r['bytes'] / 1024:>9.1f}{psnr_db or 'lossless':>9}"
+        )
+        by_asset.setdefault(os.path.splitext(r["path"])[0], {})[r["encoder"]] = r
+
+    # Encoders are only compared on the assets every one of them wrote;
+    # --tiles and frame-split renders report no GIF for the metrics
+    encoders = set().union(*by_asset.values())
+    totals = {e: {"seconds": 0.0, "bytes": 0} for e in sorted(encoders)}
+    for written in by_asset.values():
+        if written.keys() == encoders:
+            for e, r in written.items():
+                totals[e]["seconds"] = round(totals[e]["seconds"] + r["seconds"], 4)
+                totals[e]["bytes"] += r["bytes"]
+    smallest = min(totals, key=lambda e: totals[e]["bytes"])
+    fastest = min(totals, key=lambda e: totals[e]["seconds"])
+    print(
+        f"  Smallest: {smallest} ({totals[smallest]['bytes'] / 1024:.0f} KB), "
+        f"fastest: {fastest} ({totals[fastest]['seconds']:.2f}s)"
+    )
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(
+                {
+                    "settings": {
+                        "width": settings.out_w,
+                        "height": settings.out_h,
+                        "frames": settings.frames,
+                        "fps": settings.fps,
+                        "dashboard_fps": settings.dashboard_fps,
+                        "loop": settings.loop,
+                    },
+                    "files": results,
+                    "totals": totals,
+                    "smallest": smallest,
+                    "fastest": fastest,
+                },
+                f,
+                indent=2,
+            )
+        print(f"  Report: {report_path}")
@@ -0,0 +1,1254 @@
+"""
+The metric visualizers, the 2x2 dashboard and the SVG outputs (the embed of
+the dashboard GIF and the SMIL-animated vector version).
+"""
+
+import base64
+import contextlib
+import functools
+import html
+import itertools
+import math
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from .encode import (
+    encode_results,
+    forward_frames,
+    needs_samples,
+    open_encoders,
+    sample_indices,
+)
+from .timing import stage_timer
+
+# ============================================================
+# VISUALIZATION CLASSES - High Resolution, 2x2 Grid Support
+# ============================================================
+
+
+class Colors:
+    """Color palettes for different metric types."""
+
+    STAR = {
+        "primary": (255, 200, 80),
+        "secondary": (255, 150, 50),
+        "glow": (255, 220, 150),
+        "bg": (12, 10, 18),
+    }
+    FORK = {
+        "primary": (150, 120, 255),
+        "secondary": (80, 200, 255),
+        "glow": (200, 180, 255),
+        "bg": (12, 10, 18),
+    }
+    ISSUE = {
+        "primary": (255, 100, 70),
+        "secondary": (255, 160, 100),
+        "glow": (255, 200, 160),
+        "bg": (18, 12, 12),
+    }
+    FOLLOWER = {
+        "primary": (80, 210, 150),
+        "secondary": (100, 170, 240),
+        "glow": (170, 240, 210),
+        "bg": (10, 12, 15),
+    }
+    PR = {
+        "primary": (100, 180, 255),
+        "secondary": (80, 220, 180),
+        "glow": (150, 230, 220),
+        "bg": (10, 15, 20),
+    }
+
+
+class ParticleSystem:
+    """
+    Closed-form particle model: a ledger of spawns, evaluated per frame.
+
+    Every particle is recorded with the frame it was spawned in, and its
+    random draws come from an RNG stream of its own spawn call, seeded by
+    (seed, frame, call). Its state at any later frame follows from that
+    alone: it moves in a straight line, its life decays linearly and its
+    pulse advances by a fixed step per frame. Frames can thus be rendered
+    in any order and in any process, without replaying the ones before.
+    """
+
+    # Per-frame pulse advance and the life below which a particle is gone
+    PULSE_STEP = 0.15
+    MIN_LIFE = 0.05
+
+    def __init__(self, w, h, capacity=2048, seed=42):
+        self.w, self.h = w, h
+        # Most particles alive in one frame; the oldest are dropped first
+        self.capacity = capacity
+        self.reseed(seed)
+
+    def reseed(self, seed):
+        """Clear the ledger and restart the per-spawn RNG streams."""
+        self.seed = seed
+        self.frame = 0
+        self._calls = 0
+        self._batches = []
+        self._ledger = None
+        # Particle counters reported by --benchmark
+        self.spawned = 0
+        self.peak = 0
+
+    def at_frame(self, frame):
+        """Record the following spawns as happening in ``frame``."""
+        if frame != self.frame:
+            self.frame = frame
+            self._calls = 0
+
+    def next_rng(self):
+        """The RNG stream of the next spawn call in the current frame."""
+        rng = np.random.default_rng([self.seed, self.frame, self._calls])
+        self._calls += 1
+        return rng
+
+    def spawn(
+        self,
+        x,
+        y,
+        count=1,
+        size=3.0,
+        speed=1.5,
+        color=(255, 255, 255),
+        life=1.0,
+        decay=0.02,
+        angle=None,
+    ):
+        """Spawn `count` particles at each point; per-point arguments broadcast."""
+        rng = self.next_rng()
+        color = np.asarray(color, dtype=np.uint8).reshape(-1, 3)
+        args = [
+            np.atleast_1d(np.asarray(v, dtype=float)) for v in (x, y, size, life, decay)
+        ]
+        if angle is not None:
+            args.append(np.atleast_1d(np.asarray(angle, dtype=float)))
+        points = np.broadcast_shapes(color.shape[:1], *(v.shape for v in args))[0]
+        args = [np.repeat(np.broadcast_to(v, (points,)), count) for v in args]
+        color = np.repeat(np.broadcast_to(color, (points, 3)), count, axis=0)
+        n = points * count
+        if n == 0:
+            return
+
+        x, y, size, life, decay = args[:5]
+        a = args[5] if angle is not None else rng.random(n) * 6.28
+        s = max(0.1, float(speed)) * (0.5 + rng.random(n) * 0.5)
+        self._batches.append(
+            {
+                "frame": np.full(n, self.frame),
+                "x": x,
+                "y": y,
+                "vx": np.cos(a) * s,
+                "vy": np.sin(a) * s,
+                "base_size": np.maximum(0.5, size),
+                "life": np.clip(life, 0.1, 1.0),
+                "decay": np.clip(decay, 0.005, 0.05),
+                "pulse": rng.random(n) * 6.28,
+                "color": color,
+            }
+        )
+        self._ledger = None
+        self.spawned += n
+
+    def state(self, frame):
+        """
+        Position, size, life and color of the particles alive in ``frame``.
+
+        A particle spawned in frame f has moved ``frame - f + 1`` steps by
+        the time ``frame`` is drawn, as it is stepped once in the frame it
+        was spawned in. Of the particles still alive, only the newest
+        ``capacity`` are kept.
+        """
+        if self._ledger is None:
+            if not self._batches:
+                empty = np.zeros(0)
+                return empty, empty, empty, empty, np.zeros((0, 3), np.uint8)
+            self._ledger = {
+                k: np.concatenate([b[k] for b in self._batches])
+                for k in self._batches[0]
+            }
+        p = self._ledger
+        steps = frame - p["frame"] + 1
+        life = p["life"] - p["decay"] * steps
+        alive = np.flatnonzero((steps > 0) & (life > self.MIN_LIFE))
+        alive = alive[-self.capacity :]
+        self.peak = max(self.peak, len(alive))
+
+        steps, life = steps[alive], life[alive]
+        x = p["x"][alive] + p["vx"][alive] * steps
+        y = p["y"][alive] + p["vy"][alive] * steps
+        pulse = p["pulse"][alive] + self.PULSE_STEP * steps
+        sizes = p["base_size"][alive] * life * (0.85 + 0.15 * np.sin(pulse))
+        return x, y, sizes, life, p["color"][alive]
+
+    # Particle sizes are quantized to SPRITE_STEP px buckets; the sprite for
+    # every bucket is rasterized once per process.
+    SPRITE_STEP = 0.25
+    MAX_BUCKET = 24
+    GLOW_SCALE = 3.0
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _sprite(bucket):
+        """Pre-rasterized sprite for particles of size bucket * SPRITE_STEP.
+
+        Returns flat (dy, dx) offsets plus two weight tables over them: an
+        anti-aliased core disc of radius `size`, and a Gaussian glow whose
+        radius `GLOW_SCALE * size` sits at 2 sigma.
+        """
+        size = max(bucket, 1) * ParticleSystem.SPRITE_STEP
+        radius = ParticleSystem.GLOW_SCALE * size
+        half = int(math.ceil(radius))
+        d = np.arange(-half, half + 1)
+        dy, dx = (a.ravel() for a in np.meshgrid(d, d, indexing="ij"))
+        dist = np.sqrt(dy * dy + dx * dx)
+        core = np.clip(size + 0.5 - dist, 0.0, 1.0)
+        glow = np.exp(-(dist**2) / (2 * (radius / 2) ** 2))
+        return dy, dx, core, glow
+
+    def render(self, img, frame, scale=1.0, top=0):
+        """Composite the particles alive in ``frame`` onto ``img``.
+
+        Glows are added to the frame, so overlapping ones brighten it;
+        cores are then drawn over the result, as opaque discs that do not
+        sum with each other.
+
+        Positions and sizes are scaled by ``scale``; ``top`` is the row
+        the canvas starts at when it is one horizontal tile of the frame.
+        """
+        img = img.convert("RGB")
+        w, h = img.size
+        pad = int(math.ceil(self.GLOW_SCALE * self.MAX_BUCKET * self.SPRITE_STEP))
+        x, y, sizes, life, color = self.state(frame)
+
+        # Drop particles whose sprites cannot reach the canvas
+        x, y = x * scale, y * scale - top
+        vis = (x > -pad) & (x < w + pad) & (y > -pad) & (y < h + pad)
+        if not vis.any():
+            return img
+        px = np.rint(x[vis]).astype(np.int64)
+        py = np.rint(y[vis]).astype(np.int64)
+        color = color[vis].astype(np.float32)
+        alpha = (80.0 / 255.0) * life[vis]
+        sizes = sizes[vis] * scale
+        buckets = np.rint(sizes / self.SPRITE_STEP).astype(np.int64)
+        buckets = np.minimum(buckets, self.MAX_BUCKET)
+
+        # Gather every sprite pixel of every particle, one bucket at a time,
+        # into flat indices of a padded accumulation buffer. The margin
+        # holds a full sprite around any particle that passed the cut above.
+        margin = 2 * pad + 1
+        stride = w + 2 * margin
+        base_idx = (py + margin) * stride + (px + margin)
+        glow_idx, glow_weights, core_idx, core_weights = [], [], [], []
+        for bucket in np.unique(buckets).tolist():
+            sel = np.nonzero(buckets == bucket)[0]
+            dy, dx, core, glow = self._sprite(bucket)
+            offsets = dy * stride + dx
+            # Glow tinted by each particle's color and life
+            glow_idx.append((base_idx[sel, None] + offsets).ravel())
+            kern = alpha[sel, None] * glow
+            glow_weights.append((color[sel].T[:, :, None] * kern).reshape(3, -1))
+            # Core coverage, and the core colors weighted by it
+            disc = core > 0
+            core_idx.append((base_idx[sel, None] + offsets[disc]).ravel())
+            cover = np.broadcast_to(core[disc], (len(sel), disc.sum()))
+            core_weights.append(
+                np.concatenate(
+                    [(color[sel].T[:, :, None] * cover).reshape(3, -1)]
+                    + [cover.reshape(1, -1)]
+                )
+            )
+        glow_idx = np.concatenate(glow_idx)
+        glow_weights = np.concatenate(glow_weights, axis=1)
+        core_idx = np.concatenate(core_idx)
+        core_weights = np.concatenate(core_weights, axis=1)
+
+        size = stride * (h + 2 * margin)
+
+        def accumulate(idx, weights):
+            acc = np.bincount(idx, weights, size).reshape(-1, stride)
+            return acc[margin : margin + h, margin : margin + w]
+
+        # The glow blends additively, one bincount per channel for the whole
+        # frame; the cores are then drawn over it, overlapping ones in the
+        # mean of their colors, so they keep their color instead of
+        # saturating to white
+        out = np.asarray(img, dtype=np.float32) + np.dstack(
+            [accumulate(glow_idx, glow_weights[c]) for c in range(3)]
+        )
+        np.minimum(out, 255, out=out)
+        cover = accumulate(core_idx, core_weights[3])
+        hit = cover > 0
+        core_rgb = np.stack(
+            [accumulate(core_idx, core_weights[c])[hit] for c in range(3)], axis=1
+        )
+        core_rgb /= cover[hit, None]
+        coverage = np.minimum(cover[hit], 1.0)[:, None]
+        out[hit] += (core_rgb - out[hit]) * coverage
+        return Image.fromarray(np.rint(out).astype(np.uint8))
+
+
+@functools.lru_cache(maxsize=None)
+def load_fonts(font_size):
+    """Resolve the (value, title) fonts once per process for a font size."""
+    try:
+        from PIL import ImageFont
+
+        font = ImageFont.truetype("arial.ttf", font_size)
+        title_font = ImageFont.truetype("arial.ttf", int(font_size * 0.6))
+    except Exception:
+        try:
+            from PIL import ImageFont
+
+            font = ImageFont.load_default()
+            title_font = ImageFont.load_default()
+        except Exception:
+            font = None
+            title_font = None
+    return font, title_font
+
+
+class ViewDraw:
+    """ImageDraw proxy for the visualizers' fixed w x h design space.
+
+    Coordinates and line widths are scaled onto the output canvas, which
+    may be a single horizontal tile of the frame starting at row ``top``.
+    """
+
+    def __init__(self, img, scale=1.0, top=0):
+        self.img = img
+        self.draw = ImageDraw.Draw(img)
+        self.scale = scale
+        self.top = top
+
+    def _map(self, xy, top):
+        s = self.scale
+        if isinstance(xy[0], (tuple, list)):
+            return [(x * s, y * s - top) for x, y in xy]
+        return [v * s - (top if i % 2 else 0) for i, v in enumerate(xy)]
+
+    def _width(self, width):
+        return max(1, round(width * self.scale))
+
+    def _shape(self, method, xy, **options):
+        mapped = self._map(xy, self.top)
+        ys = (
+            [y for _, y in mapped] if isinstance(xy[0], (tuple, list)) else mapped[1::2]
+        )
+        if not self.top or min(ys) >= 0:
+            getattr(self.draw, method)(mapped, **options)
+            return
+        # PIL rounds negative coordinates differently from positive ones,
+        # so a shape cut by the tile's top edge would not line up with the
+        # tile above. It is drawn on a canvas lifted up to its first row
+        # instead (or to the frame's, when it starts above the frame), where
+        # every coordinate has the sign it has in the untiled frame.
+        lift = self.top if min(ys) + self.top < 0 else math.ceil(-min(ys))
+        w, h = self.img.size
+        canvas = Image.new(self.img.mode, (w, h + lift))
+        canvas.paste(self.img, (0, lift))
+        getattr(ImageDraw.Draw(canvas), method)(
+            self._map(xy, self.top - lift), **options
+        )
+        self.img.paste(canvas.crop((0, lift, w, h + lift)))
+
+    def line(self, xy, fill=None, width=1):
+        self._shape("line", xy, fill=fill, width=self._width(width))
+
+    def ellipse(self, xy, fill=None, outline=None, width=1):
+        self._shape("ellipse", xy, fill=fill, outline=outline, width=self._width(width))
+
+    def polygon(self, xy, fill=None, outline=None):
+        self._shape("polygon", xy, fill=fill, outline=outline)
+
+
+class MetricVisualizer:
+    """Base class for metric visualizations with high resolution.
+
+    Subclasses draw in a w x h design space; frames come out scaled by
+    ``scale``, and with ``tile=(top, bottom)`` only those output rows are
+    rendered (see --tiles).
+    """
+
+    # Closing frames of every loop that blend the last frame back into the
+    # first, since the motions do not all return to their start at t=2π
+    CROSSFADE_FRAMES = 8
+
+    def __init__(self, w, h, palette, label, scale=1.0, tile=None):
+        self.w, self.h = w, h
+        self.palette = palette
+        self.label = label
+        self.scale = scale
+        self.out_w, self.out_h = round(w * scale), round(h * scale)
+        self.top, self.bottom = tile or (0, self.out_h)
+        self.system = ParticleSystem(w, h)
+        self._emitted = None
+        # (value, layer): the static background layer (bg fill, label and
+        # value text) of the last value drawn, built once, copied per frame
+        self._static_layer = None
+        self.font_size = self.font_size_for(self.out_h)
+
+    @staticmethod
+    def font_size_for(h):
+        # Use larger font size for high resolution
+        return max(24, int(h * 0.12))
+
+    def make_frame(self, metric_value, frame_idx, total_frames):
+        # Everything else the layer depends on is fixed per instance
+        if self._static_layer is None or self._static_layer[0] != metric_value:
+            self._static_layer = (metric_value, self.make_static_layer(metric_value))
+        return self._static_layer[1].copy()
+
+    def make_static_layer(self, metric_value):
+        """Draw the parts of a frame that never change: bg, label and value."""
+        size = (self.out_w, self.bottom - self.top)
+        img = Image.new("RGB", size, self.palette["bg"])
+        draw = ImageDraw.Draw(img)
+
+        # Label at top with larger font
+        font, title_font = load_fonts(self.font_size)
+
+        bbox = draw.textbbox((0, 0), self.label, font=title_font)
+        text_w = bbox[2] - bbox[0]
+        draw.text(
+            ((self.out_w - text_w) / 2, 20 * self.scale - self.top),
+            self.label,
+            fill=self.palette["secondary"],
+            font=title_font,
+        )
+
+        # Value at bottom with larger font
+        value_str = f"{metric_value:,}"
+        bbox = draw.textbbox((0, 0), value_str, font=font)
+        text_w = bbox[2] - bbox[0]
+        text_h = bbox[3] - bbox[1]
+        draw.text(
+            (
+                (self.out_w - text_w) / 2,
+                self.out_h - text_h - 30 * self.scale - self.top,
+            ),
+            value_str,
+            fill=self.palette["primary"],
+            font=font,
+        )
+
+        return img
+
+    def draw(self, img):
+        return ViewDraw(img, self.scale, self.top)
+
+    def composite(self, img, frame_idx):
+        """Draw the particles alive in ``frame_idx`` onto ``img``."""
+        with stage_timer("particle_render"):
+            img.paste(self.system.render(img, frame_idx, self.scale, self.top), (0, 0))
+
+    def animate_frame(self, img, metric_value, frame_idx, total_frames):
+        """Draw the frame's shapes; the particles are composited on top."""
+
+    def spawn_particles(self, metric_value, frame_idx, total_frames):
+        """Spawn the particles emitted in ``frame_idx``."""
+
+    def vector_shapes(self, metric_value, t):
+        """
+        The animated shapes at phase ``t`` in [0, 2π), for --format svg.
+
+        Returns ``(tag, attributes)`` pairs in the w x h design space; the
+        same shapes in the same order at every ``t``. Fills of ``"@glow"``
+        or ``"@primary"`` are soft radial gradients of that palette color;
+        particles are circles of their glow radius, ``GLOW_SCALE`` times the
+        size they are spawned with.
+        """
+        return []
+
+    def emit(self, metric_value, frames=40, seed=42):
+        """Record every particle spawn of the loop, once per value and seed."""
+        if self._emitted == (metric_value, frames, seed):
+            return
+        with stage_timer("particle_spawn"):
+            # Each visualizer owns its seeded RNG streams, so the output
+            # does not depend on what was rendered before it (or where)
+            self.system.reseed(seed)
+            rng = self.system.next_rng()
+
+            # Pre-seed particles for rich animation
+            self.system.spawn(
+                rng.uniform(20, self.w - 20, 40),
+                rng.uniform(50, self.h - 80, 40),
+                1,
+                2.5,
+                0.35,
+                self.palette["glow"],
+                0.85,
+                0.012,
+            )
+            for i in range(frames):
+                self.system.at_frame(i)
+                self.spawn_particles(metric_value, i, frames)
+        self._emitted = (metric_value, frames, seed)
+
+    def render_frame(self, metric_value, frame_idx, frames=40, seed=42):
+        """Render one frame of the loop as RGB, without rendering any other."""
+        self.emit(metric_value, frames, seed)
+        with stage_timer("make_frame"):
+            frame = self.make_frame(metric_value, frame_idx, frames)
+        with stage_timer("animate_frame"):
+            self.animate_frame(frame, metric_value, frame_idx, frames)
+        self.composite(frame, frame_idx)
+        return frame
+
+    def iter_frames(self, metric_value, frames=40, seed=42, only=None, pingpong=False):
+        """Yield ``(index, frame)`` for the looped animation, one RGB frame at a time.
+
+        Frames are rendered on their own (see render_frame), so with
+        ``only`` just those frame indices are rendered, in order. With
+        ``pingpong`` only the forward half is yielded (see forward_frames)
+        and there is no crossfade; the GIF writer mirrors the rest.
+        """
+        # CROSSFADE INTERPOLATION for smooth looping
+        # The last frames are replaced by a blend from the last frame back
+        # to the first for a seamless transition
+        looped = frames if pingpong else frames - self.CROSSFADE_FRAMES
+        wanted = sorted(
+            range(forward_frames(frames, pingpong)) if only is None else only
+        )
+        ends = None
+
+        for i in wanted:
+            if i < looped:
+                yield i, self.render_frame(metric_value, i, frames, seed)
+                continue
+            if ends is None:
+                ends = [
+                    self.render_frame(metric_value, k, frames, seed)
+                    for k in (frames - 1, 0)
+                ]
+            # Blend from last_frame (1.0) to first_frame (0.0) - reverse order for smooth return
+            blend = (i - looped) / (self.CROSSFADE_FRAMES - 1)
+            with stage_timer("crossfade"):
+                frame = Image.blend(ends[0], ends[1], blend)
+            yield i, frame
+
+    def frame_source(self, metric_value, frames=40, seed=42, pingpong=False):
+        """
+        A compose_2x2_grid() source over this animation's RGB frames.
+
+        Every read renders the frames again, one at a time, so the
+        dashboard gets the exact frames instead of ones decoded back from
+        the quantized GIF, without keeping any of them around.
+        """
+
+        def source(only=None):
+            return (
+                frame
+                for _, frame in self.iter_frames(
+                    metric_value, frames, seed, only=only, pingpong=pingpong
+                )
+            )
+
+        return source
+
+    def animate(
+        self,
+        metric_value,
+        path,
+        frames=40,
+        fps=15,
+        seed=42,
+        dither=False,
+        delta=True,
+        pingpong=False,
+        extra_paths=(),
+        measure=False,
+        spool=None,
+    ):
+        """Generate animated GIF with high quality settings - seamless looping with crossfade.
+
+        Frames are streamed: the animation is run once for the handful of
+        frames the palette is sampled from, then again while every frame
+        is quantized and handed to the GIF writer, so only a few frames are
+        alive at any time.
+
+        The same frames also go to an encoder per ``extra_paths`` entry,
+        picked by extension (see open_encoders). Returns each encoder's
+        time and size (encode_results), plus its PSNR with ``measure``,
+        which renders the frames once more. With ``spool``, the RGB frames
+        are also written raw to that file, for iter_spooled_frames().
+        """
+        paths = [path, *extra_paths]
+        with stage_timer(
+            "animate",
+            profile=f"animate-{type(self).__name__}",
+            visualizer=type(self).__name__,
+            value=metric_value,
+        ):
+            print(f"  {self.label}: {metric_value:,} ({frames} frames)...")
+
+            # Map all frames onto one palette built from a sample of them
+            samples = None
+            if needs_samples(paths):
+                picks = sample_indices(forward_frames(frames, pingpong))
+                samples = [
+                    [
+                        frame
+                        for _, frame in self.iter_frames(
+                            metric_value,
+                            frames,
+                            seed,
+                            only=picks,
+                            pingpong=pingpong,
+                        )
+                    ]
+                ]
+            encoders = open_encoders(
+                paths,
+                fps,
+                pingpong,
+                samples,
+                fixed_colors=self.palette.values(),
+                stride=max(1, round(self.scale)),
+                dither=dither,
+                delta=delta,
+            )
+            del samples
+
+            source = self.frame_source(metric_value, frames, seed, pingpong)
+
+            # Every frame is written, so the crossfade frames are preserved
+            with contextlib.ExitStack() as stack:
+                for encoder in encoders:
+                    stack.enter_context(encoder)
+                spooled = stack.enter_context(open(spool, "wb")) if spool else None
+                for frame in source():
+                    for encoder in encoders:
+                        encoder.add_frame(frame)
+                    if spooled:
+                        spooled.write(frame.tobytes())
+            for p in paths:
+                print(f"    Saved: {p}")
+        return encode_results(encoders, source if measure else None)
+
+
+class StarVisualizer(MetricVisualizer):
+    """Animated star visualization with orbital particles - TRULY PERIODIC for smooth looping."""
+
+    def layout(self, metric_value, t):
+        """Orbiting stars and background sparkles at phase ``t``."""
+        cx, cy = self.w / 2, self.h / 2 + 10
+
+        # Orbiting stars - deterministic positions that return to start
+        count = max(15, min(45, int(math.log(max(1, metric_value + 1)) * 10)))
+        i = np.arange(count)
+        # Each star has a unique phase offset and orbital pattern
+        # At t=0 and t=2π, star positions are IDENTICAL
+        phase_offset = (i / count) * 2 * math.pi
+        orbit_r = 50 + 18 * np.sin(phase_offset * 2 + i * 0.3)
+
+        angle = phase_offset + t * 0.5
+        r = orbit_r + 8 * np.sin(t * 2 + i * 0.2)
+        stars = (cx + np.cos(angle) * r, cy + np.sin(angle) * r, angle)
+
+        # Background sparkles - periodic pulsing that returns to start
+        j = np.arange(8)
+        # Fixed positions that pulse in brightness periodically
+        x = 40 + (self.w - 80) * (j / 7)
+        y = 70 + (self.h - 150) * ((j * 0.7) % 1)
+        # Brightness varies sinusoidally, returns to same at t=0 and t=2π
+        b = 0.5 + 0.4 * np.sin(t * 2 + j * 0.8)
+        return stars, (x, y, b)
+
+    def spawn_particles(self, metric_value, frame_idx, total_frames):
+        # Use periodic time (0 to 2π) - completes EXACTLY one full cycle
+        t = (frame_idx / total_frames) * 2 * math.pi
+        (sx, sy, angle), (x, y, b) = self.layout(metric_value, t)
+
+        self.system.spawn(
+            sx, sy, 1, 3.0, 0.25, self.palette["primary"], 0.65, 0.01, angle + 1.57
+        )
+        c = (np.outer(b, self.palette["glow"])).astype(np.uint8)
+        self.system.spawn(x, y, 1, 1.2, 0, c, 0.5, 0.015)
+
+    def vector_shapes(self, metric_value, t):
+        (sx, sy, _), (x, y, b) = self.layout(metric_value, t)
+        glow = ParticleSystem.GLOW_SCALE
+        shapes = [
+            (
+                "circle",
+                {"cx": px, "cy": py, "r": 1.2 * glow, "fill": "@glow", "opacity": o},
+            )
+            for px, py, o in zip(x, y, b)
+        ]
+        shapes += [
+            ("circle", {"cx": px, "cy": py, "r": 3.0 * glow, "fill": "@primary"})
+            for px, py in zip(sx, sy)
+        ]
+        return shapes
+
+
+class ForkVisualizer(MetricVisualizer):
+    """Animated fork visualization with branching patterns - TRULY PERIODIC."""
+
+    def layout(self, metric_value, t):
+        """Branch end points and orbiting particles at phase ``t``."""
+        cx, cy = self.w / 2, self.h / 2 + 10
+
+        # Branching lines that pulse and rotate periodically
+        branches = max(6, min(15, int(math.sqrt(max(1, metric_value + 1))) + 3))
+        ends = []
+        for i in range(branches):
+            phase_offset = (i / branches) * 2 * math.pi
+            angle = phase_offset - 1.57 + t * 0.15
+            length = 55 + 10 * math.sin(phase_offset + t + i * 0.4)
+            ends.append((cx + math.cos(angle) * length, cy + math.sin(angle) * length))
+
+        # Orbiting particles - positions return to start
+        count = max(12, min(40, int(math.log(max(1, metric_value + 1)) * 6)))
+        i = np.arange(count)
+        phase_offset = (i / count) * 2 * math.pi
+        angle = phase_offset + t * 0.4
+        r = 30 + 22 * np.abs(np.sin(phase_offset + t * 0.8 + i * 0.2))
+        return (cx, cy), ends, (cx + np.cos(angle) * r, cy + np.sin(angle) * r)
+
+    def animate_frame(self, img, metric_value, frame_idx, total_frames):
+        # Use periodic time (0 to 2π) - one complete cycle
+        t = (frame_idx / total_frames) * 2 * math.pi
+        (cx, cy), ends, _ = self.layout(metric_value, t)
+
+        for ex, ey in ends:
+            draw = self.draw(img)
+            draw.line([cx, cy, ex, ey], fill=self.palette["primary"], width=3)
+
+    def spawn_particles(self, metric_value, frame_idx, total_frames):
+        t = (frame_idx / total_frames) * 2 * math.pi
+        _, _, (x, y) = self.layout(metric_value, t)
+        self.system.spawn(x, y, 1, 2.4, 0.3, self.palette["glow"], 0.55, 0.01)
+
+    def vector_shapes(self, metric_value, t):
+        (cx, cy), ends, (x, y) = self.layout(metric_value, t)
+        glow = ParticleSystem.GLOW_SCALE
+        primary = svg_color(self.palette["primary"])
+        shapes = [
+            (
+                "line",
+                {
+                    "x1": cx,
+                    "y1": cy,
+                    "x2": ex,
+                    "y2": ey,
+                    "stroke": primary,
+                    "stroke-width": 3,
+                },
+            )
+            for ex, ey in ends
+        ]
+        shapes += [
+            ("circle", {"cx": px, "cy": py, "r": 2.4 * glow, "fill": "@glow"})
+            for px, py in zip(x, y)
+        ]
+        return shapes
+
+
+class IssueVisualizer(MetricVisualizer):
+    """Animated issue visualization with pulsing and floating indicators - TRULY PERIODIC."""
+
+    def layout(self, metric_value, t):
+        """Pulsing ring radii and floating indicators at phase ``t``."""
+        cx, cy = self.w / 2, self.h / 2 + 10
+
+        # Pulsing circles - radius returns to start
+        pulse = 35 + 12 * math.sin(t * 2.2)
+        rings = [pulse + i * 15 for i in range(3)]
+
+        # Floating issue indicators - deterministic periodic motion
+        count = max(10, min(35, max(1, metric_value // 2)))
+        i = np.arange(count)
+        # Phase offset ensures periodic return
+        phase_offset = (i / count) * 2 * math.pi
+        # Motion is sinusoidal and periodic
+        y = self.h - 85 - 35 * (1 - np.cos(phase_offset + t * 1.5))
+        x = cx + 80 * np.sin(phase_offset + t + i * 0.35)
+        sz = np.maximum(0.6, 2.5 + np.sin(phase_offset + t * 2 + i) * 1.0)
+        return (cx, cy), rings, (x, y, sz)
+
+    def animate_frame(self, img, metric_value, frame_idx, total_frames):
+        # Use periodic time (0 to 2π) - one complete cycle
+        t = (frame_idx / total_frames) * 2 * math.pi
+        (cx, cy), rings, _ = self.layout(metric_value, t)
+
+        for rs in rings:
+            draw = self.draw(img)
+            draw.ellipse(
+                [cx - rs, cy - rs, cx + rs, cy + rs],
+                outline=self.palette["primary"],
+                width=3,
+            )
+
+    def spawn_particles(self, metric_value, frame_idx, total_frames):
+        t = (frame_idx / total_frames) * 2 * math.pi
+        _, _, (x, y, sz) = self.layout(metric_value, t)
+        self.system.spawn(x, y, 1, sz, 0.4, self.palette["primary"], 0.75, 0.012)
+
+    def vector_shapes(self, metric_value, t):
+        (cx, cy), rings, (x, y, sz) = self.layout(metric_value, t)
+        glow = ParticleSystem.GLOW_SCALE
+        primary = svg_color(self.palette["primary"])
+        shapes = [
+            (
+                "circle",
+                {
+                    "cx": cx,
+                    "cy": cy,
+                    "r": rs,
+                    "fill": "none",
+                    "stroke": primary,
+                    "stroke-width": 3,
+                },
+            )
+            for rs in rings
+        ]
+        shapes += [
+            ("circle", {"cx": px, "cy": py, "r": s * glow, "fill": "@primary"})
+            for px, py, s in zip(x, y, sz)
+        ]
+        return shapes
+
+
+class FollowerVisualizer(MetricVisualizer):
+    """Animated follower visualization with network nodes - TRULY PERIODIC."""
+
+    def layout(self, metric_value, t):
+        """Network nodes, their link strengths and orbiting particles at phase ``t``."""
+        cx, cy = self.w / 2, self.h / 2 + 10
+
+        # Network nodes - positions return to start
+        nodes = max(6, min(18, max(1, metric_value)))
+        node_pos = []
+        for i in range(nodes):
+            phase_offset = (i / nodes) * 2 * math.pi
+            angle = phase_offset + t * 0.18
+            r = 35 + 16 * math.sin(phase_offset + t + i * 0.35)
+            node_pos.append((cx + math.cos(angle) * r, cy + math.sin(angle) * r))
+
+        # Connection lines - alpha returns to start; None for nodes too far apart
+        links = []
+        for i in range(len(node_pos)):
+            for j in range(i + 1, len(node_pos)):
+                x1, y1 = node_pos[i]
+                x2, y2 = node_pos[j]
+                d = math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+                alpha = int(200 * (1 - d / 75)) if d < 75 else None
+                links.append((x1, y1, x2, y2, alpha))
+
+        # Orbiting particles - positions return to start
+        count = max(10, min(28, int(math.log(max(1, metric_value + 1)) * 5)))
+        i = np.arange(count)
+        phase_offset = (i / count) * 2 * math.pi
+        angle = phase_offset + t * 0.6
+        r = 25 + 12 * np.sin(phase_offset + t + i * 0.25)
+        return node_pos, links, (cx + np.cos(angle) * r, cy + np.sin(angle) * r)
+
+    def animate_frame(self, img, metric_value, frame_idx, total_frames):
+        # Use periodic time (0 to 2π) - one complete cycle
+        t = (frame_idx / total_frames) * 2 * math.pi
+        node_pos, links, _ = self.layout(metric_value, t)
+
+        for nx, ny in node_pos:
+            draw = self.draw(img)
+            draw.ellipse([nx - 5, ny - 5, nx + 5, ny + 5], fill=self.palette["primary"])
+
+        for x1, y1, x2, y2, alpha in links:
+            if alpha is not None:
+                c = tuple(int(v * alpha / 255) for v in self.palette["secondary"])
+                draw = self.draw(img)
+                draw.line([x1, y1, x2, y2], fill=c, width=2)
+
+    def spawn_particles(self, metric_value, frame_idx, total_frames):
+        t = (frame_idx / total_frames) * 2 * math.pi
+        _, _, (x, y) = self.layout(metric_value, t)
+        self.system.spawn(x, y, 1, 1.8, 0.25, self.palette["glow"], 0.5, 0.015)
+
+    def vector_shapes(self, metric_value, t):
+        node_pos, links, (x, y) = self.layout(metric_value, t)
+        glow = ParticleSystem.GLOW_SCALE
+        secondary = svg_color(self.palette["secondary"])
+        shapes = [
+            (
+                "line",
+                {
+                    "x1": x1,
+                    "y1": y1,
+                    "x2": x2,
+                    "y2": y2,
+                    "stroke": secondary,
+                    "stroke-width": 2,
+                    "stroke-opacity": (alpha or 0) / 255,
+                },
+            )
+            for x1, y1, x2, y2, alpha in links
+        ]
+        primary = svg_color(self.palette["primary"])
+        shapes += [
+            ("circle", {"cx": nx, "cy": ny, "r": 5, "fill": primary})
+            for nx, ny in node_pos
+        ]
+        shapes += [
+            ("circle", {"cx": px, "cy": py, "r": 1.8 * glow, "fill": "@glow"})
+            for px, py in zip(x, y)
+        ]
+        return shapes
+
+
+class PRVisualizer(MetricVisualizer):
+    """Animated PR visualization with merging patterns."""
+
+    def animate_frame(self, img, metric_value, frame_idx, total_frames):
+        cx, cy = self.w / 2, self.h / 2 + 10
+
+        # Merge arrows
+        for i in range(2):
+            offset = (i - 0.5) * 40
+            draw = self.draw(img)
+            # Arrow shaft
+            draw.line(
+                [cx - 30, cy + offset, cx + 30, cy + offset],
+                fill=self.palette["primary"],
+                width=3,
+            )
+            # Arrow head
+            draw.polygon(
+                [
+                    (cx + 30, cy + offset),
+                    (cx + 20, cy + offset - 10),
+                    (cx + 20, cy + offset + 10),
+                ],
+                fill=self.palette["primary"],
+            )
+
+    def spawn_particles(self, metric_value, frame_idx, total_frames):
+        t = (frame_idx / total_frames) * 2 * math.pi
+        cx, cy = self.w / 2, self.h / 2 + 10
+
+        # Floating PR indicators
+        count = max(8, min(30, max(1, metric_value // 3)))
+        i = np.arange(count)
+        y = self.h - 85 - (frame_idx / total_frames) * 80 + 18 * np.sin(t * 1.5 + i)
+        x = cx + (i - count / 2) * 18 * np.sin(t + i * 0.35)
+        sz = np.maximum(0.5, 2.2 + np.sin(t * 2 + i) * 0.9)
+        self.system.spawn(x, y, 1, sz, 0.35, self.palette["primary"], 0.7, 0.013)
+
+        # Orbiting particles - deterministic positions
+        j = np.arange(3)
+        angle = (j / 3) * 6.28 + t
+        r = 55 + 15 * np.sin(t + j)
+        x = cx + np.cos(angle) * r
+        y = cy + np.sin(angle) * r
+        self.system.spawn(x, y, 1, 2.0, 0.2, self.palette["glow"], 0.45, 0.016)
+
+
+def compose_2x2_grid(
+    sources,
+    out_path,
+    frame_count,
+    fps=12,
+    cell_size=(600, 300),
+    fixed_colors=(),
+    dither=False,
+    delta=True,
+    pingpong=False,
+    extra_paths=(),
+    measure=False,
+    reference_sources=None,
+    stride=1,
+):
+    """Compose a 2x2 grid dashboard from four frame sources, one grid frame at a time.
+
+    Each source is a callable returning a fresh iterator over its RGB
+    frames; called with ``only=indices`` it yields just those frames.
+    Sources are read twice: once for the frames the palette is sampled
+    from, then in lockstep while each grid frame is pasted, quantized and
+    handed to the GIF writer. With ``pingpong`` only the forward half of
+    the grid frames is composed and the writer mirrors it. The palette is
+    sampled from every ``stride``-th row and column of the cells.
+
+    Grid frames also go to an encoder per ``extra_paths`` entry, as in
+    MetricVisualizer.animate(), and the encode results are returned. With
+    ``measure`` their PSNR is taken against the grid of
+    ``reference_sources`` (by default ``sources``), which should yield the
+    exact RGB frames when ``sources`` are decoded from lossy files.
+    """
+    paths = [out_path, *extra_paths]
+    with stage_timer("dashboard", profile="dashboard", path=out_path):
+        print("  Building 2x2 grid dashboard...")
+        print(f"    Using {frame_count} frames for grid...")
+        frame_count = forward_frames(frame_count, pingpong)
+
+        # One palette for the whole dashboard, sampled from all four metrics
+        samples = None
+        if needs_samples(paths):
+            picks = sample_indices(frame_count)
+            samples = [
+                list(itertools.islice(source(only=set(picks)), len(picks)))
+                for source in sources
+            ]
+        encoders = open_encoders(
+            paths,
+            fps,
+            pingpong,
+            samples,
+            fixed_colors=fixed_colors,
+            stride=stride,
+            dither=dither,
+            delta=delta,
+        )
+        del samples
+
+        def grid_frames(sources=sources):
+            # Every grid frame is pasted into one preallocated canvas and
+            # encoded straight away, so no per-frame RGB grid images are
+            # kept around
+            cell_w, cell_h = cell_size
+            canvas = Image.new("RGB", (cell_w * 2, cell_h * 2))
+            offsets = [(0, 0), (cell_w, 0), (0, cell_h), (cell_w, cell_h)]
+
+            # Create grid frames - all 4 animations synchronized at same frame index
+            streams = itertools.islice(
+                zip(*(source() for source in sources)), frame_count
+            )
+            for cells in streams:
+                with stage_timer("grid_compose"):
+                    for frame, offset in zip(cells, offsets):
+                        if frame.size != cell_size:
+                            frame = frame.resize(cell_size, Image.LANCZOS)
+                        canvas.paste(frame, offset)
+                yield canvas
+
+        with contextlib.ExitStack() as stack:
+            for encoder in encoders:
+                stack.enter_context(encoder)
+            for canvas in grid_frames():
+                for encoder in encoders:
+                    encoder.add_frame(canvas)
+        for encoder in encoders:
+            print(f"    Saved: {encoder.path} ({encoder.frames} frames)")
+    reference = functools.partial(grid_frames, reference_sources or sources)
+    return encode_results(encoders, reference if measure else None)
+
+
+@stage_timer("svg", profile="svg")
+def create_svg_embedded_gif(
+    gif_path, output_path, metrics, width=1200, height=600, owner="Marcelo Burgos"
+):
+    """Create SVG embed for the GIF with responsive sizing."""
+    print("  Building SVG embed...")
+    stars, forks, issues = metrics["stars"], metrics["forks"], metrics["issues"]
+    followers, repos = metrics["followers"], metrics["repos"]
+
+    with stage_timer("svg_embed"), open(gif_path, "rb") as f:
+        gif_data = base64.b64encode(f.read()).decode("ascii")
+
+    svg = f'''<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="{width}" height="{height}" viewBox="0 0 {width} {height}">
+  <title>{owner} - GitHub Profile Metrics</title>
+  <desc>GitHub profile metrics: {stars:,} total stars, {forks:,} total forks, {issues:,} open issues, {followers:,} followers across {repos:,} repositories</desc>
+  <defs>
+    <style>
+      .metrics-gif {{
+        width: 100%;
+        height: auto;
+        border-radius: 12px;
+        box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
+      }}
+    </style>
+  </defs>
+  <foreignObject width="100%" height="100%">
+    <div xmlns="http://www.w3.org/1999/xhtml" style="display:flex;justify-content:center;align-items:center;width:100%;height:100%;background:transparent;">
+      <img src="data:image/gif;base64,{gif_data}" alt="GitHub Metrics: {stars:,} stars, {forks:,} forks, {issues:,} issues, {followers:,} followers across {repos:,} repositories" class="metrics-gif"/>
+    </div>
+  </foreignObject>
+</svg>'''
+
+    with open(output_path, "w") as f:
+        f.write(svg)
+    print(f"    Saved: {output_path}")
+
+
+# ============================================================
+# VECTOR OUTPUT - SMIL-animated SVG, no raster frames
+# ============================================================
+
+# Phases sampled per loop; SMIL interpolates linearly between them
+VECTOR_KEYFRAMES = 16
+
+
+def svg_color(rgb):
+    return "#{:02x}{:02x}{:02x}".format(*(int(c) for c in rgb))
+
+
+def blend(a, b, f):
+    return a if isinstance(a, str) else a + (b - a) * f
+
+
+def svg_number(value, digits=1):
+    if isinstance(value, str):
+        return value
+    return f"{float(value):.{digits}f}".rstrip("0").rstrip(".")
+
+
+def vector_geometry(tag, attrs):
+    """
+    Fold a shape's coordinates into one attribute, so a moving shape needs
+    a single animation: circles move by ``translate``, lines become paths.
+    """
+    attrs = dict(attrs)
+    if tag == "circle":
+        cx, cy = attrs.pop("cx"), attrs.pop("cy")
+        attrs["translate"] = f"{svg_number(cx)} {svg_number(cy)}"
+    elif tag == "line":
+        x1, y1, x2, y2 = (svg_number(attrs.pop(k)) for k in ("x1", "y1", "x2", "y2"))
+        attrs["d"] = f"M{x1} {y1}L{x2} {y2}"
+        tag = "path"
+    return tag, attrs
+
+
+def vector_cell(visualizer, metric_value, frames, fps, x=0, y=0, cell_id="m"):
+    """
+    One metric as a nested ``<svg>`` cell at (x, y) on the output canvas.
+
+    Every shape attribute that changes over the loop becomes an
+    ``<animate>`` over evenly spaced keyframes. Over the part of the loop
+    the GIF shows as is they follow the animation; over the GIF's
+    crossfade frames the shapes glide back to where they started.
+    """
+    vw, vh = visualizer.w, visualizer.h
+    palette = visualizer.palette
+    # Loops shorter than the crossfade are all crossfade, as in iter_frames()
+    looped = max(0, frames - visualizer.CROSSFADE_FRAMES)
+    # Enough keyframes that the crossfade starts on one of them
+    step = frames // math.gcd(looped, frames)
+    count = -(-VECTOR_KEYFRAMES // step) * step
+    shown = looped * count // frames
+    keyframes = [
+        visualizer.vector_shapes(metric_value, 2 * math.pi * k / count)
+        for k in range(shown + 1)
+    ]
+    start, end = keyframes[0], keyframes[-1]
+    for k in range(shown + 1, count + 1):
+        f = (k - shown) / (count - shown)
+        keyframes.append(
+            [
+                (tag, {a: blend(v, first[a], f) for a, v in attrs.items()})
+                for (tag, attrs), (_, first) in zip(end, start)
+            ]
+        )
+    timing = f'dur="{frames / fps:g}s" repeatCount="indefinite"'
+
+    out = [
+        f'<svg x="{svg_number(x)}" y="{svg_number(y)}" width="{vw}" height="{vh}" '
+        f'viewBox="0 0 {vw} {vh}">',
+        "<defs>",
+    ]
+    for name in ("glow", "primary"):
+        color = svg_color(palette[name])
+        out.append(
+            f'<radialGradient id="{cell_id}-{name}">'
+            f'<stop offset="0" stop-color="{color}"/>'
+            f'<stop offset="0.35" stop-color="{color}" stop-opacity="0.6"/>'
+            f'<stop offset="1" stop-color="{color}" stop-opacity="0"/>'
+            "</radialGradient>"
+        )
+    out.append("</defs>")
+    out.append(f'<rect width="{vw}" height="{vh}" fill="{svg_color(palette["bg"])}"/>')
+
+    for shape_frames in zip(*keyframes):
+        shape_frames = [vector_geometry(*shape) for shape in shape_frames]
+        tag = shape_frames[0][0]
+        if all(
+            attrs.get("opacity", 1) == 0 or attrs.get("stroke-opacity", 1) == 0
+            for _, attrs in shape_frames
+        ):
+            # Never visible during the loop, e.g. links between far-apart nodes
+            continue
+        static, animated = [], []
+        for attr, value in shape_frames[0][1].items():
+            values = [svg_number(attrs[attr]) for _, attrs in shape_frames]
+            if isinstance(value, str) and value.startswith("@"):
+                static.append(f'{attr}="url(#{cell_id}-{value[1:]})"')
+            elif len(set(values)) == 1:
+                if attr == "translate":
+                    static.append(f'transform="translate({values[0]})"')
+                else:
+                    static.append(f'{attr}="{values[0]}"')
+            elif attr == "translate":
+                animated.append(
+                    '<animateTransform attributeName="transform" '
+                    f'type="translate" {timing} values="{";".join(values)}"/>'
+                )
+            else:
+                animated.append(
+                    f'<animate attributeName="{attr}" {timing} '
+                    f'values="{";".join(values)}"/>'
+                )
+        if animated:
+            out.append(f"<{tag} {' '.join(static)}>{''.join(animated)}</{tag}>")
+        else:
+            out.append(f"<{tag} {' '.join(static)}/>")
+
+    # Label and value, placed like MetricVisualizer.make_static_layer()
+    font_size = visualizer.font_size_for(vh)
+    out.append(
+        f'<text x="{vw / 2:g}" y="20" text-anchor="middle" '
+        f'dominant-baseline="hanging" font-family="Arial, sans-serif" '
+        f'font-size="{int(font_size * 0.6)}" fill="{svg_color(palette["secondary"])}">'
+        f"{html.escape(visualizer.label)}</text>"
+    )
+    out.append(
+        f'<text x="{vw / 2:g}" y="{vh - 30}" text-anchor="middle" '
+        f'font-family="Arial, sans-serif" font-weight="bold" '
+        f'font-size="{font_size}" fill="{svg_color(palette["primary"])}">'
+        f"{metric_value:,}</text>"
+    )
+    out.append("</svg>")
+    return "\n".join(out)
+
+
+def create_vector_svg(
+    cells, output_path, width, height, title, desc="", frames=40, fps=15
+):
+    """
+    Write an animated SVG of (visualizer, value) cells laid out left to
+    right, top to bottom, two per row when there are more than one, looping
+    like a GIF of ``frames`` frames at ``fps``.
+    """
+    vw, vh = cells[0][0].w, cells[0][0].h
+    columns = min(2, len(cells))
+    rows = -(-len(cells) // columns)
+    body = [
+        vector_cell(
+            visualizer,
+            value,
+            frames,
+            fps,
+            (n % columns) * vw,
+            (n // columns) * vh,
+            f"c{n}",
+        )
+        for n, (visualizer, value) in enumerate(cells)
+    ]
+    svg = "\n".join(
+        [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
+            f'height="{height}" viewBox="0 0 {vw * columns} {vh * rows}">',
+            f"<title>{html.escape(title)}</title>",
+            f"<desc>{html.escape(desc)}</desc>" if desc else "",
+            *body,
+            "</svg>",
+        ]
+    )
+    with open(output_path, "w") as f:
+        f.write(svg)
+    print(f"    Saved: {output_path} ({len(svg) / 1024:.1f} KB)")
@@ -0,0 +1,161 @@
+"""
+Wall time per pipeline stage, shared by the fetch and render code for
+--benchmark and --profile.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+
+class StageTimer:
+    """
+    Wall time per named pipeline stage, for --benchmark and --profile.
+
+    Stages may nest; each stage is charged its own time only, without the
+    stages inside it, so the totals add up to the instrumented wall time.
+    While ``enabled`` is off, timing a stage costs one attribute check.
+
+    With ``trace_path`` set (--profile), every stage is also kept as a Chrome
+    trace event, and stages opened with ``profile=<name>`` are run under
+    cProfile when ``profile_dir`` is set. Worker processes ``flush()`` their
+    events next to the trace file; ``save()`` merges them into it.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_path = None
+        self.profile_dir = None
+        self.reset()
+
+    def reset(self):
+        self.seconds = {}
+        self.calls = {}
+        self.events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def __call__(self, name, profile=None, **trace_args):
+        """
+        Time a stage. Yields the trace args, so the caller can add what it
+        only learns inside the stage (status codes, byte counts, ...).
+        """
+        if not self.enabled:
+            yield trace_args
+            return
+        children = self._local.__dict__.setdefault("children", [])
+        children.append(0.0)
+        profiler = self._start_profile() if profile else None
+        start = time.perf_counter_ns()
+        try:
+            yield trace_args
+        except BaseException as e:
+            trace_args["error"] = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            if profiler is not None:
+                profiler.disable()
+                stem = f"{profile}.{os.getpid()}.{start}".replace(os.sep, "_")
+                profiler.dump_stats(os.path.join(self.profile_dir, f"{stem}.prof"))
+            own = elapsed - children.pop()
+            if children:
+                children[-1] += elapsed
+            with self._lock:
+                self.seconds[name] = self.seconds.get(name, 0.0) + own / 1e9
+                self.calls[name] = self.calls.get(name, 0) + 1
+                if self.trace_path:
+                    self.events.append(
+                        {
+                            "name": name,
+                            "ph": "X",
+                            "ts": start / 1000,
+                            "dur": elapsed / 1000,
+                            "pid": os.getpid(),
+                            "tid": threading.get_ident(),
+                            "args": trace_args,
+                        }
+                    )
+
+    def _start_profile(self):
+        if not self.profile_dir:
+            return None
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already running on this thread
+            return None
+        return profiler
+
+    def report(self):
+        """``{stage: {"seconds": ..., "calls": ...}}``, slowest stage first."""
+        return {
+            name: {"seconds": round(seconds, 4), "calls": self.calls[name]}
+            for name, seconds in sorted(self.seconds.items(), key=lambda i: -i[1])
+        }
+
+    def flush(self):
+        """Append this process's trace events to its part file and drop them."""
+        if not (self.trace_path and self.events):
+            return
+        with self._lock:
+            events, self.events = self.events, []
+        # A forked worker inherits the parent's unflushed events; those are
+        # the parent's to write
+        pid = os.getpid()
+        events = [e for e in events if e["pid"] == pid]
+        with open(f"{self.trace_path}.{pid}.part", "a") as f:
+            for event in events:
+                f.write(json.dumps(event, default=str) + "\n")
+
+    def save(self):
+        """Write the Chrome trace (chrome://tracing, Perfetto) from every process."""
+        self.flush()
+        events = []
+        trace = Path(self.trace_path)
+        for part in sorted(trace.parent.glob(f"{trace.name}.*.part")):
+            with open(part) as f:
+                events.extend(json.loads(line) for line in f)
+            part.unlink()
+        events.sort(key=lambda e: e["ts"])
+        with open(trace, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return events
+
+
+stage_timer = StageTimer()
+
+
+def print_profile_summary(events, trace_path, profile_dir=None):
+    """Summarize a --profile trace: API traffic and the slowest stages."""
+    print(f"\n[PROFILE] {len(events)} spans written to {trace_path}")
+    api = [e for e in events if e["name"] == "api"]
+    if api:
+        total = sum(e["args"].get("bytes", 0) for e in api)
+        latency = sum(e["dur"] for e in api) / 1000
+        print(
+            f"   API: {len(api)} requests, {total / 1024:,.1f} KB, "
+            f"{latency:,.0f} ms total latency"
+        )
+        for e in sorted(api, key=lambda e: -e["dur"])[:5]:
+            print(
+                f"     {e['dur'] / 1000:>8.0f} ms  {e['args'].get('status', '-')}  "
+                f"{e['args'].get('bytes', 0):>8,} B  {e['args']['url']}"
+            )
+    seconds = {}
+    for e in events:
+        if e["name"] in ("fetch", "animate", "dashboard", "svg"):
+            label = e["args"].get("visualizer") or e["args"].get("login") or ""
+            key = f"{e['name']} {label}".strip()
+            seconds[key] = seconds.get(key, 0) + e["dur"] / 1e6
+    for key, total in sorted(seconds.items(), key=lambda i: -i[1]):
+        print(f"   {total:>8.2f} s  {key}")
+    if profile_dir:
+        print(f"   cProfile dumps: {profile_dir}/")
@@ -0,0 +1,45 @@
+"""Fixtures for testing the fetch layer offline against MockGitHubServer."""
+
+import pytest
+
+from metrics.fetch import GitHubClient, SnapshotStore
+from metrics.mock_server import MockGitHubServer
+
+
+@pytest.fixture
+def serve():
+    """Start a MockGitHubServer with the given options; stopped after the test."""
+    servers = []
+
+    def start(**options):
+        server = MockGitHubServer(**options).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def make_client():
+    """A GitHubClient for a mock server, with a token and no ETag cache by default."""
+
+    def make(server, token="test-token", cache_path=None, **options):
+        return GitHubClient(
+            token=token,
+            base_url=server.url,
+            graphql_url=None,
+            cache_path=cache_path,
+            **options,
+        )
+
+    return make
+
+
+@pytest.fixture
+def store():
+    store = SnapshotStore(":memory:")
+    yield store
+    store.close()
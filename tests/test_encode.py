@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from metrics.encode import (
+    GIF_TRANSPARENT_INDEX,
+    GifWriter,
+    build_global_palette,
+    iter_gif_frames,
+    quantize_frame,
+)
+
+W, H = 48, 32
+
+
+def make_frames(count):
+    """A square moving over a gradient, then held still for the second half."""
+    x, y = np.meshgrid(np.arange(W), np.arange(H))
+    background = np.dstack([x * 5, y * 7, (x + y) * 3]).astype(np.uint8)
+    frames = []
+    for i in range(count):
+        rgb = background.copy()
+        left = 4 * min(i, count // 2)
+        rgb[8:20, left : left + 12] = (255, 200, 0)
+        frames.append(Image.fromarray(rgb))
+    return frames
+
+
+@pytest.mark.parametrize("dither", [False, True])
+def test_quantize_frame_leaves_transparent_index(dither):
+    rng = np.random.default_rng(0)
+    # A fixed color the samples lack is only matched by its own entry, last
+    palette = build_global_palette([make_frames(6)], fixed_colors=[(0, 255, 128)])
+    # Noise over the whole cube, plus black, white and the fixed color
+    noise = rng.integers(0, 256, (H, W, 3), dtype=np.uint8)
+    noise[:4, :4], noise[-4:, -4:], noise[:4, -4:] = 0, 255, (0, 255, 128)
+
+    indices = np.asarray(quantize_frame(Image.fromarray(noise), palette, dither))
+
+    assert indices.max() < GIF_TRANSPARENT_INDEX
+
+
+@pytest.mark.parametrize("pingpong", [False, True])
+def test_delta_frames_decode_like_full_frames(tmp_path, pingpong):
+    frames = make_frames(10)
+    palette = build_global_palette([frames])
+    indexed = [quantize_frame(frame, palette) for frame in frames]
+    order = list(range(10))
+    if pingpong:
+        order += order[-2:0:-1]
+    expected = [np.asarray(indexed[i].convert("RGB")) for i in order]
+
+    decoded = {}
+    for delta in (False, True):
+        path = tmp_path / f"delta{delta}.gif"
+        with GifWriter(path, palette, 60, delta=delta, pingpong=pingpong) as gif:
+            for frame in indexed:
+                gif.add_frame(frame)
+        decoded[delta] = [np.asarray(frame) for frame in iter_gif_frames(path, 60)]
+
+    assert len(decoded[True]) == len(expected)
+    for full, delta, want in zip(decoded[False], decoded[True], expected):
+        np.testing.assert_array_equal(delta, full)
+        np.testing.assert_array_equal(delta, want)
@@ -0,0 +1,101 @@
+import pytest
+import requests
+
+from metrics.fetch import RateLimitExceeded, fetch_github_profile_metrics
+
+LOGIN = "HackCocaine"
+REPOS = f"users/{LOGIN}/repos"
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_get_pages_follows_link(serve, make_client, concurrent):
+    server = serve(repos=250)
+
+    repos = make_client(server).get_pages(
+        REPOS, {"per_page": 100}, concurrent=concurrent
+    )
+
+    assert [repo["name"] for repo in repos] == [f"repo-{i:05d}" for i in range(250)]
+    # Page 1 names the last page, so no short-page probe follows page 3
+    assert server.stats[200] == 3
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_get_pages_skips_empty_pages(serve, make_client, concurrent):
+    server = serve(repos=30)
+    client = make_client(server)
+    # Every tenth repository is empty, so each of its pages is a 204
+    empty = f"repos/{LOGIN}/repo-00009/contributors"
+
+    # A first page linking to pages 2 and 3, walked by the Link header
+    contributors = client.get(f"repos/{LOGIN}/repo-00000/contributors", {"per_page": 1})
+    linked = client.get_pages(
+        empty, {"per_page": 1}, first=contributors, concurrent=concurrent
+    )
+    # A full first page without links, walked until a short page
+    repos = client.get(REPOS)
+    walked = client.get_pages(empty, {}, first=repos, concurrent=concurrent)
+
+    assert linked == contributors.data
+    assert walked == repos.data
+    assert server.stats[204] == 3
+
+
+def test_etag_revalidation(serve, make_client, tmp_path):
+    server = serve()
+    cache_path = tmp_path / "etags.json"
+    first = make_client(server, cache_path=cache_path)
+    fresh = first.get(REPOS, {"per_page": 100})
+    first.save()
+
+    second = make_client(server, cache_path=cache_path)
+    cached = second.get(REPOS, {"per_page": 100})
+
+    assert not fresh.cached and cached.cached and not cached.stale
+    assert cached.data == fresh.data
+    assert server.stats[304] == 1
+    # A 304 leaves the budget alone
+    assert second.rate_limits["core"]["remaining"] == 4999
+
+
+def test_rate_limit_skip_serves_stale(serve, make_client, tmp_path):
+    server = serve(rate_limits={"core": 2})
+    cache_path = tmp_path / "etags.json"
+    first = make_client(server, cache_path=cache_path)
+    first.get(f"users/{LOGIN}")
+    first.get(REPOS)
+    first.save()
+
+    # The 304 reports the spent budget, so the listing is never requested
+    second = make_client(server, cache_path=cache_path)
+    second.get(f"users/{LOGIN}")
+    stale = second.get(REPOS)
+
+    assert stale.stale and stale.data == first.get(REPOS).data
+    assert server.stats["core"] == 3
+    with pytest.raises(RateLimitExceeded):
+        second.get(REPOS, {"page": 2})
+
+
+def test_spent_budget_is_refused(serve, make_client):
+    server = serve(rate_limits={"core": 0})
+
+    with pytest.raises(requests.HTTPError) as excinfo:
+        make_client(server).get(f"users/{LOGIN}")
+
+    assert excinfo.value.response.status_code == 403
+    assert server.stats[403] == 1
+
+
+def test_profile_metrics(serve, make_client, store):
+    server = serve(repos=250)
+
+    metrics = fetch_github_profile_metrics(
+        make_client(server), store, full_sync=True, login=LOGIN
+    )
+
+    assert metrics["repos"] == 250
+    assert metrics["stars"] == sum(i % 7 for i in range(250))
+    # Every tenth repository is empty; the rest share contributors.json
+    assert metrics["contributors"] == 3
+    assert store.latest(LOGIN)["api"] == "rest"
@@ -0,0 +1,43 @@
+from metrics.fetch import fetch_github_profile_metrics_graphql
+
+LOGIN = "HackCocaine"
+
+
+def test_totals_across_pages(serve, make_client, store):
+    server = serve()
+
+    metrics = fetch_github_profile_metrics_graphql(make_client(server), store, LOGIN)
+
+    assert metrics == {
+        "stars": 969,
+        "forks": 112,
+        "open_issues": 90,
+        "followers": 57,
+        # The two collaborator repositories on page 2 are summed, not counted
+        "repos": 112,
+        "prs": 31,
+        # 24 on the first pages, two more on the second mentionableUsers page
+        # of repo-00000 and one on a collaborator repository
+        "contributors": 27,
+    }
+    # Two repository pages and one mentionableUsers follow-up
+    assert server.stats["graphql"] == 3
+    assert store.latest(LOGIN)["api"] == "graphql"
+
+
+def test_error_response_falls_back(serve, make_client, store):
+    # An exhausted budget is answered with profile_metrics_error.json
+    server = serve(rate_limits={"graphql": 0})
+
+    client = make_client(server)
+    assert fetch_github_profile_metrics_graphql(client, store, LOGIN) is None
+    assert server.stats[200] == 1
+    assert store.latest(LOGIN) is None
+
+
+def test_needs_token(serve, make_client, store):
+    server = serve()
+
+    client = make_client(server, token="")
+    assert fetch_github_profile_metrics_graphql(client, store, LOGIN) is None
+    assert server.stats["graphql"] == 0
@@ -0,0 +1,42 @@
+import pytest
+
+from metrics.pipeline import Settings, render_all
+
+LOGIN = "HackCocaine"
+METRICS = {"stars": 969, "forks": 112, "issues": 90, "followers": 57, "repos": 112}
+
+
+def render(tmp_path, monkeypatch, **options):
+    """Render every asset at 120x60 in a directory of its own; return their bytes."""
+    out = tmp_path.joinpath("-".join(f"{k}{v}" for k, v in options.items()))
+    out.mkdir()
+    monkeypatch.chdir(out)
+    render_all(Settings(scale=0.2, frames=4, **options), {LOGIN: METRICS})
+    return {
+        path.name: path.read_bytes()
+        for path in (out / "assets").iterdir()
+        if path.name != "render_manifest.json"
+    }
+
+
+@pytest.mark.parametrize("jobs", [2, 8])
+def test_jobs_render_the_same_bytes(tmp_path, monkeypatch, jobs):
+    serial = render(tmp_path, monkeypatch, jobs=1)
+
+    # With more workers than metrics, each metric's frames are split
+    assert render(tmp_path, monkeypatch, jobs=jobs) == serial
+    assert sorted(serial) == [
+        "metric_followers.gif",
+        "metric_forks.gif",
+        "metric_issues.gif",
+        "metric_stars.gif",
+        "metrics_dashboard.gif",
+        "metrics_dashboard.svg",
+    ]
+
+
+def test_tiles_render_the_same_bytes(tmp_path, monkeypatch):
+    # 60 rows on 8-row boundaries: strips of 24, 24 and 12 rows
+    assert render(tmp_path, monkeypatch, tiles=3) == render(
+        tmp_path, monkeypatch, tiles=1
+    )
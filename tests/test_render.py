@@ -0,0 +1,47 @@
+import numpy as np
+
+from metrics.render import ParticleSystem
+
+FIELDS = ("x", "y", "vx", "vy", "base_size", "life", "decay", "pulse", "color")
+
+
+def test_state_matches_stepping():
+    system = ParticleSystem(120, 60)
+    particles, expected = [], []
+    for frame in range(40):
+        system.at_frame(frame)
+        recorded = len(system._batches)
+        if frame % 3 == 0:
+            system.spawn(60, 30, count=5, size=2.0, color=(255, 200, 0), decay=0.04)
+        system.spawn([10, 110], 30, count=2, decay=[0.03, 0.07])
+        for batch in system._batches[recorded:]:
+            particles += [
+                {k: batch[k][i] for k in FIELDS} for i in range(len(batch["x"]))
+            ]
+
+        # Step every particle once, as the old per-frame update did
+        for p in particles:
+            p["x"] += p["vx"]
+            p["y"] += p["vy"]
+            p["life"] -= p["decay"]
+            p["pulse"] += ParticleSystem.PULSE_STEP
+        particles = [p for p in particles if p["life"] > ParticleSystem.MIN_LIFE]
+        expected.append(
+            (
+                [p["x"] for p in particles],
+                [p["y"] for p in particles],
+                [
+                    p["base_size"] * p["life"] * (0.85 + 0.15 * np.sin(p["pulse"]))
+                    for p in particles
+                ],
+                [p["life"] for p in particles],
+                [p["color"] for p in particles],
+            )
+        )
+
+    # Every frame is evaluated from the whole ledger, in any order
+    for frame in reversed(range(40)):
+        state = system.state(frame)
+        for actual, steps in zip(state, expected[frame]):
+            np.testing.assert_allclose(actual, steps)
+    assert system.peak < system.capacity